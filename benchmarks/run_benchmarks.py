@@ -0,0 +1,264 @@
+import os
+import sys
+import json
+import time
+import shutil
+import logging
+import argparse
+import platform
+import tempfile
+import statistics
+import subprocess
+
+# Constants
+SCHEDULE_SIZES = (2, 14, 96, 1440, 10000)
+DEFAULT_BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baseline.json")
+DEFAULT_TOLERANCE = 0.5  # Allowed slowdown relative to the baseline (0.5 = 50%)
+MISSING_BASELINE_EXIT = 2
+REPEATS = 5
+MIN_SAMPLE_TIME = 0.05  # seconds each repeat should run for
+STARTUP_RUNS = 5
+IMAGE_COUNT = 4
+IMAGE_SIZE = (640, 480)
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Benchmarks run headless, so always use the recording backend
+os.environ["TIMEBG_BACKEND"] = "recording"
+
+def time_call(func):
+    """Time func and return the median and minimum seconds per call over several repeats"""
+    # Find a loop count that runs long enough to measure reliably
+    loops = 1
+    while True:
+        start = time.perf_counter()
+        for _ in range(loops):
+            func()
+        elapsed = time.perf_counter() - start
+        if elapsed >= MIN_SAMPLE_TIME or loops >= 1_000_000:
+            break
+        loops *= 10
+
+    samples = [elapsed / loops]
+    for _ in range(REPEATS - 1):
+        start = time.perf_counter()
+        for _ in range(loops):
+            func()
+        samples.append((time.perf_counter() - start) / loops)
+
+    return {"median_s": statistics.median(samples), "min_s": min(samples), "loops": loops}
+
+def make_time_ranges(count, images):
+    """Create a synthetic schedule of count ranges spread evenly over the day"""
+    minutes = [i * 24 * 60 // count for i in range(count)]
+    time_points = [f"{m // 60:02d}:{m % 60:02d}" for m in minutes]
+    return [
+        {
+            "start": time_points[i],
+            "end": time_points[(i + 1) % count],
+            "image": images[i % len(images)]
+        }
+        for i in range(count)
+    ]
+
+def make_images(directory):
+    """Create a few small test images to schedule"""
+    from PIL import Image
+
+    images = []
+    for i in range(IMAGE_COUNT):
+        path = os.path.join(directory, f"image_{i}.jpg")
+        Image.new('RGB', IMAGE_SIZE, (i * 60, 100, 200 - i * 40)).save(path)
+        images.append(path)
+    return images
+
+def make_app(main, directory, time_ranges, settings=None):
+    """Create a TimeBasedBackground whose config files live in directory"""
+    app = main.TimeBasedBackground()
+    # Background validation threads would add noise to the timed loops
+    app.preflight_enabled = False
+    app.app_path = directory
+    app.config_path = os.path.join(directory, main.CONFIG_FILE)
+    app.time_points_config_path = os.path.join(directory, main.TIME_POINTS_CONFIG_FILE)
+    app.time_ranges = time_ranges
+    app.settings = settings or {}
+    app.save_config()
+    app.load_config()
+    return app
+
+def bench_schedule(main, directory, images, results):
+    """Benchmark schedule lookups and config load/save for each schedule size"""
+    for count in SCHEDULE_SIZES:
+        app = make_app(main, directory, make_time_ranges(count, images))
+        results[f"get_current_time_range[{count}]"] = time_call(app.get_current_time_range)
+        results[f"next_transition[{count}]"] = time_call(app.next_transition)
+        results[f"load_config[{count}]"] = time_call(app.load_config)
+        results[f"save_config[{count}]"] = time_call(app.save_config)
+        results[f"check_config_updated[{count}]"] = time_call(app.check_config_updated)
+
+        def changed_reload():
+            # As after a change notification for content that differs from the loaded config
+            app.config_hash = None
+            app.config_changed.set()
+            if not app.check_config_updated():
+                raise RuntimeError("check_config_updated did not reload a changed configuration")
+
+        results[f"check_config_updated[{count},reload]"] = time_call(changed_reload)
+
+def bench_solar(main, directory, images, results):
+    """Benchmark lookups in a schedule of solar time points, which is compiled once per day"""
+    time_points = ["civil_dawn", "sunrise", "solar_noon", "sunset-30", "sunset", "civil_dusk"]
+    time_ranges = [
+        {"start": start, "end": time_points[(i + 1) % len(time_points)], "image": images[i % len(images)]}
+        for i, start in enumerate(time_points)
+    ]
+    app = make_app(main, directory, time_ranges, {"latitude": 52.52, "longitude": 13.405})
+    results["get_current_time_range[solar]"] = time_call(app.get_current_time_range)
+    results["next_transition[solar]"] = time_call(app.next_transition)
+
+def bench_calendar(main, directory, images, results):
+    """Benchmark lookups in a schedule with weekday, season and holiday rules layered over it"""
+    base = make_time_ranges(14, images)
+    schedules = [
+        {"name": "weekend", "weekdays": ["sat", "sun"], "priority": 10, "time_ranges": make_time_ranges(4, images)},
+        {"name": "winter", "from": "12-01", "to": "02-28", "priority": 5, "time_ranges": make_time_ranges(6, images)},
+        {"name": "holidays", "dates": ["01-01", "12-25", "12-26"], "priority": 100, "time_ranges": make_time_ranges(2, images)},
+    ]
+    app = make_app(main, directory, base)
+    app.apply_config({"time_ranges": base, "schedules": schedules})
+    results["get_current_time_range[calendar]"] = time_call(app.get_current_time_range)
+    results["next_transition[calendar]"] = time_call(app.next_transition)
+
+def bench_update_background(main, directory, images, results):
+    """Benchmark the apply path against the recording backend with a warm render cache"""
+    app = make_app(main, directory, make_time_ranges(14, images))
+    app.update_background()
+    results["update_background[unchanged]"] = time_call(app.update_background)
+
+    def forced_update():
+        # Same reset as a forced apply in monitor_iteration; the identity alone would skip the apply
+        app.current_bg = None
+        app.current_bg_identity = None
+        app.update_background()
+
+    applied = app.backend.backend.applied
+    applies_before = len(applied)
+    results["update_background[apply]"] = time_call(forced_update)
+    if len(applied) <= applies_before:
+        raise RuntimeError("Forced update_background did not apply a wallpaper")
+    applied.clear()
+
+def bench_startup(directory, results):
+    """Measure a fresh interpreter's time from launch to the first wallpaper apply"""
+    script = (
+        "import os, sys, logging\n"
+        # Configured before main is imported, so its log goes to the benchmark directory, not the repo
+        f"logging.basicConfig(level=logging.INFO, filename=os.path.join({directory!r}, 'timebased_bg.log'))\n"
+        f"sys.path.insert(0, {REPO_ROOT!r})\n"
+        "import main\n"
+        "app = main.TimeBasedBackground()\n"
+        f"app.config_path = os.path.join({directory!r}, main.CONFIG_FILE)\n"
+        f"app.app_path = {directory!r}\n"
+        "app.load_config()\n"
+        "app.update_background()\n"
+    )
+    samples = []
+    for _ in range(STARTUP_RUNS):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, "-c", script], check=True)
+        samples.append(time.perf_counter() - start)
+    results["startup_to_first_apply"] = {
+        "median_s": statistics.median(samples), "min_s": min(samples), "loops": 1
+    }
+
+def run_all():
+    """Run every benchmark and return the results keyed by benchmark name"""
+    # Logging every call would dominate the timings. Configuring it before main
+    # is imported also keeps main from creating its log file in the repo.
+    logging.basicConfig(handlers=[logging.NullHandler()])
+    logging.disable(logging.CRITICAL)
+
+    sys.path.insert(0, REPO_ROOT)
+    import main
+
+    results = {}
+    directory = tempfile.mkdtemp(prefix="timebg_bench_")
+    try:
+        images = make_images(directory)
+        bench_schedule(main, directory, images, results)
+        bench_solar(main, directory, images, results)
+        bench_calendar(main, directory, images, results)
+        bench_update_background(main, directory, images, results)
+        make_app(main, directory, make_time_ranges(14, images))
+        bench_startup(directory, results)
+    finally:
+        logging.disable(logging.NOTSET)
+        shutil.rmtree(directory, ignore_errors=True)
+    return results
+
+def compare(results, baseline, tolerance):
+    """Compare results to a baseline and return the names of benchmarks that regressed"""
+    regressions = []
+    for name, result in results.items():
+        reference = baseline.get(name)
+        if not reference:
+            continue
+        # The minimum is the least sensitive to noise from other processes
+        ratio = result["min_s"] / reference["min_s"]
+        result["baseline_ratio"] = ratio
+        if ratio > 1 + tolerance:
+            regressions.append(name)
+    return regressions
+
+def print_table(results, regressions):
+    """Print a human readable summary of the results"""
+    for name, result in results.items():
+        ratio = result.get("baseline_ratio")
+        ratio_text = f"{ratio:6.2f}x" if ratio is not None else "      -"
+        flag = "  REGRESSION" if name in regressions else ""
+        print(f"{name:40s} {result['min_s'] * 1e6:14.2f} us  {ratio_text}{flag}", file=sys.stderr)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark TimeBasedBackground hot paths")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE, help="Baseline results file to compare against")
+    parser.add_argument("--save-baseline", action="store_true", help="Write the results as the new baseline")
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE, help="Allowed slowdown ratio above 1.0")
+    parser.add_argument("--output", help="Write the JSON results to this file instead of stdout")
+    args = parser.parse_args(argv)
+
+    results = run_all()
+
+    regressions = []
+    missing_baseline = not args.save_baseline and not os.path.exists(args.baseline)
+    if not args.save_baseline and not missing_baseline:
+        with open(args.baseline, 'r') as f:
+            baseline = json.load(f).get("results", {})
+        regressions = compare(results, baseline, args.tolerance)
+
+    report = {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "results": results,
+        "regressions": regressions,
+    }
+
+    print_table(results, regressions)
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=4)
+    else:
+        print(json.dumps(report, indent=4))
+
+    if args.save_baseline:
+        with open(args.baseline, 'w') as f:
+            json.dump({"python": report["python"], "platform": report["platform"], "results": results}, f, indent=4)
+        print(f"Baseline saved to {args.baseline}", file=sys.stderr)
+
+    if missing_baseline:
+        # Baselines are machine specific, so a run without one cannot catch a regression
+        print(
+            f"ERROR: no baseline at {args.baseline}, nothing was compared. "
+            "Record one on this machine with --save-baseline.",
+            file=sys.stderr
+        )
+        return MISSING_BASELINE_EXIT
+    return 1 if regressions else 0
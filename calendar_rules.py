@@ -0,0 +1,132 @@
+import array
+import logging
+import datetime
+
+# Constants
+WEEKDAYS = ("mon", "tue", "wed", "thu", "fri", "sat", "sun")
+
+def parse_calendar_date(value):
+    """Parse "YYYY-MM-DD" or a yearly recurring "MM-DD" into (year or None, month, day)"""
+    parts = value.split('-')
+    if len(parts) == 3:
+        date = datetime.date(int(parts[0]), int(parts[1]), int(parts[2]))
+        return date.year, date.month, date.day
+    if len(parts) == 2:
+        # Validate against a leap year so "02-29" is accepted
+        date = datetime.date(2000, int(parts[0]), int(parts[1]))
+        return None, date.month, date.day
+    raise ValueError(f"Invalid date: {value}")
+
+class CalendarRule:
+    """A set of time ranges that applies on the dates matching every condition the rule sets.
+
+    Conditions are "weekdays" (e.g. ["sat", "sun"]), a season from "from" to
+    "to" inclusive, which wraps past the new year when "from" is later, and
+    explicit "dates". Dates without a year recur every year.
+    """
+    def __init__(self, config, position):
+        self.position = position  # Order in the config; breaks ties between equal priorities
+        self.name = config.get("name") or f"schedule {position + 1}"
+        self.priority = int(config.get("priority", 0))
+        self.time_ranges = list(config.get("time_ranges", []))
+
+        weekdays = config.get("weekdays")
+        self.weekdays = frozenset(WEEKDAYS.index(day.lower()[:3]) for day in weekdays) if weekdays else None
+
+        self.season = None
+        if config.get("from") or config.get("to"):
+            self.season = (
+                parse_calendar_date(config.get("from", "01-01")),
+                parse_calendar_date(config.get("to", "12-31"))
+            )
+
+        dates = config.get("dates")
+        self.dates = frozenset(parse_calendar_date(date) for date in dates) if dates else None
+
+    def in_season(self, date):
+        (start_year, *start), (end_year, *end) = self.season
+        if start_year is not None or end_year is not None:
+            start_date = datetime.date(start_year or datetime.MINYEAR, *start)
+            end_date = datetime.date(end_year or datetime.MAXYEAR, *end)
+            return start_date <= date <= end_date
+        month_day = [date.month, date.day]
+        if start <= end:
+            return start <= month_day <= end
+        return month_day >= start or month_day <= end
+
+    def matches(self, date):
+        """Check whether the rule applies on a date"""
+        if self.weekdays is not None and date.weekday() not in self.weekdays:
+            return False
+        if self.season is not None and not self.in_season(date):
+            return False
+        if self.dates is not None and (
+            (date.year, date.month, date.day) not in self.dates and (None, date.month, date.day) not in self.dates
+        ):
+            return False
+        return True
+
+class CalendarRules:
+    """Date-dependent schedules layered over the base time ranges by priority.
+
+    For a date, the matching rules' time ranges come first, highest priority
+    first, followed by the base ranges. Compiled into a ScheduleIndex, where
+    the first range covering a minute wins, a rule overrides lower ones only
+    during the times its ranges cover. Which rules match each day of a year
+    is computed once per year into a table, so a date lookup is one index.
+    """
+    def __init__(self, schedules, base_time_ranges):
+        rules = []
+        for position, config in enumerate(schedules):
+            try:
+                rules.append(CalendarRule(config, position))
+            except (TypeError, ValueError, AttributeError) as e:
+                logging.warning(f"Skipping invalid schedule {config!r}: {e}")
+        self.rules = sorted(rules, key=lambda rule: (-rule.priority, rule.position))
+        self.base_time_ranges = list(base_time_ranges)
+        self._years = {}  # year -> (first ordinal, array of combination ids per day)
+        self._combinations = []  # Tuples of positions in self.rules
+        self._combination_ids = {}
+        self._time_ranges = {}  # combination id -> combined time ranges
+
+    def all_time_ranges(self):
+        """Get the time ranges of every rule followed by the base ranges"""
+        return [time_range for rule in self.rules for time_range in rule.time_ranges] + self.base_time_ranges
+
+    def _year_table(self, year):
+        """Get the table of rule combinations for every day of a year, building it on first use"""
+        table = self._years.get(year)
+        if table is None:
+            first_ordinal = datetime.date(year, 1, 1).toordinal()
+            days = datetime.date(year + 1, 1, 1).toordinal() - first_ordinal
+            combination_ids = array.array('H')
+            for ordinal in range(first_ordinal, first_ordinal + days):
+                date = datetime.date.fromordinal(ordinal)
+                combination = tuple(i for i, rule in enumerate(self.rules) if rule.matches(date))
+                combination_id = self._combination_ids.get(combination)
+                if combination_id is None:
+                    combination_id = self._combination_ids[combination] = len(self._combinations)
+                    self._combinations.append(combination)
+                combination_ids.append(combination_id)
+            table = self._years[year] = (first_ordinal, combination_ids)
+        return table
+
+    def combination_for(self, date):
+        """Get the id of the set of rules active on a date"""
+        first_ordinal, combination_ids = self._year_table(date.year)
+        return combination_ids[date.toordinal() - first_ordinal]
+
+    def rules_for(self, date):
+        """Get the rules active on a date, highest priority first"""
+        return [self.rules[i] for i in self._combinations[self.combination_for(date)]]
+
+    def time_ranges_for(self, date):
+        """Get the time ranges for a date, ordered so that higher priorities win where they overlap"""
+        combination_id = self.combination_for(date)
+        time_ranges = self._time_ranges.get(combination_id)
+        if time_ranges is None:
+            time_ranges = [
+                time_range for i in self._combinations[combination_id] for time_range in self.rules[i].time_ranges
+            ] + self.base_time_ranges
+            self._time_ranges[combination_id] = time_ranges
+        return time_ranges
@@ -0,0 +1,45 @@
+import time
+import datetime
+
+class SystemClock:
+    """The real wall clock; waiting blocks the calling thread"""
+    def now(self):
+        """Get the current local time"""
+        return datetime.datetime.now()
+
+    def time(self):
+        """Get the current POSIX timestamp"""
+        return time.time()
+
+    def wait(self, event, timeout):
+        """Wait for event to be set or timeout seconds to pass; returns True if it was set"""
+        return event.wait(timeout)
+
+class SimulatedClock:
+    """Virtual clock that jumps forward instead of sleeping.
+
+    Local times are derived from a virtual POSIX timestamp, so DST changes
+    happen exactly as they would in real time. Once the clock reaches its
+    end time, stop_event is set so the simulated loop exits.
+    """
+    def __init__(self, start, end, stop_event):
+        self.current = start.timestamp()
+        self.end = end.timestamp()
+        self.stop_event = stop_event
+        self.wakeups = 0
+
+    def now(self):
+        return datetime.datetime.fromtimestamp(self.current)
+
+    def time(self):
+        return self.current
+
+    def wait(self, event, timeout):
+        self.wakeups += 1
+        if event.is_set():
+            return True
+
+        self.current = min(self.current + timeout, self.end)
+        if self.current >= self.end:
+            self.stop_event.set()
+        return event.is_set()
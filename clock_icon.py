@@ -0,0 +1,65 @@
+import math
+from PIL import Image, ImageDraw
+
+# Constants
+ICON_SIZE = 64
+DIAL_COLOR = (0, 114, 206)  # Blue
+FACE_COLOR = (255, 255, 255)  # White
+HOUR_HAND = (15, 4)  # length, width
+MINUTE_HAND = (21, 3)
+HOUR_HAND_STEPS = 12 * 12  # The hour hand moves in five minute steps
+
+class ClockIconAtlas:
+    """Tray clock icons composed from cached, pre-rendered hand masks.
+
+    The dial is drawn once. Each hand position is drawn at most once into a
+    1-bit mask, so producing the icon for a new minute is two mask pastes
+    onto a copy of the dial. Everything stays in memory.
+    """
+    def __init__(self, size=ICON_SIZE):
+        self.size = size
+        self.center = size / 2
+        self.dial = Image.new('RGB', (size, size), FACE_COLOR)
+        draw = ImageDraw.Draw(self.dial)
+        draw.ellipse((4, 4, size - 4, size - 4), fill=DIAL_COLOR)
+        draw.ellipse((8, 8, size - 8, size - 8), fill=FACE_COLOR)
+
+        self._hour_masks = {}
+        self._minute_masks = {}
+        self._frame_key = None
+        self._frame = None
+
+    def _draw_hand(self, angle, hand):
+        """Draw a hand pointing at angle degrees clockwise from 12 o'clock into a mask"""
+        length, width = hand
+        radians = math.radians(angle)
+        end = (self.center + length * math.sin(radians), self.center - length * math.cos(radians))
+        mask = Image.new('1', (self.size, self.size), 0)
+        ImageDraw.Draw(mask).line((self.center, self.center) + end, fill=1, width=width)
+        return mask
+
+    def hour_mask(self, step):
+        """Get the hour hand mask for one of HOUR_HAND_STEPS positions"""
+        mask = self._hour_masks.get(step)
+        if mask is None:
+            mask = self._hour_masks[step] = self._draw_hand(step * 360 / HOUR_HAND_STEPS, HOUR_HAND)
+        return mask
+
+    def minute_mask(self, minute):
+        """Get the minute hand mask for a minute of the hour"""
+        mask = self._minute_masks.get(minute)
+        if mask is None:
+            mask = self._minute_masks[minute] = self._draw_hand(minute * 6, MINUTE_HAND)
+        return mask
+
+    def frame(self, moment):
+        """Get the clock icon showing the time of a datetime or time object"""
+        hour_step = (moment.hour % 12) * 12 + moment.minute // 5
+        key = (hour_step, moment.minute)
+        if key != self._frame_key:
+            frame = self.dial.copy()
+            frame.paste(DIAL_COLOR, mask=self.hour_mask(hour_step))
+            frame.paste(DIAL_COLOR, mask=self.minute_mask(moment.minute))
+            self._frame_key = key
+            self._frame = frame
+        return self._frame
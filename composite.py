@@ -0,0 +1,104 @@
+import os
+import hashlib
+import logging
+import threading
+from render_cache import RENDER_EXTENSION, BACKGROUND_COLOR, DEFAULT_FIT_MODE, FIT_MODES
+
+# Constants
+COMPOSITE_PREFIX = "composite_"
+
+def sort_monitors(monitors):
+    """Get monitor rectangles (x, y, width, height) ordered left to right, then top to bottom"""
+    return tuple(sorted(tuple(monitor) for monitor in monitors))
+
+def virtual_desktop(monitors):
+    """Get the bounding rectangle (x, y, width, height) of all monitors"""
+    left = min(x for x, _, _, _ in monitors)
+    top = min(y for _, y, _, _ in monitors)
+    right = max(x + width for x, _, width, _ in monitors)
+    bottom = max(y + height for _, y, _, height in monitors)
+    return left, top, right - left, bottom - top
+
+def monitor_images(time_range, monitor_count):
+    """Get the image for each monitor of a time range.
+
+    The optional "images" list holds one image per monitor in the order of
+    sort_monitors(). Monitors without their own entry use "image".
+    """
+    fallback = time_range.get("image") or ""
+    images = time_range.get("images") or []
+    return [
+        images[i] if i < len(images) and images[i] else fallback
+        for i in range(monitor_count)
+    ]
+
+def configured_images(time_range):
+    """Get every image a time range refers to, for all monitors"""
+    if not isinstance(time_range, dict):
+        return []
+    images = [time_range.get("image")] + list(time_range.get("images") or [])
+    return [image for image in dict.fromkeys(images) if image]
+
+class CompositeCache:
+    """Spanning wallpapers composed from one image per monitor.
+
+    Each monitor's image is rendered at that monitor's size through the render
+    cache and pasted at the monitor's position on a canvas covering the whole
+    virtual desktop. Composites are keyed by the monitor layout, the fit mode
+    and the content of every input image, so a range switch or a re-plug only
+    composes again when one of those changed. They are stored next to the
+    rendered wallpapers and share their byte budget.
+    """
+    def __init__(self, render_cache):
+        self.render_cache = render_cache
+        self._lock = threading.Lock()
+
+    def composite_key(self, image_paths, monitors, fit_mode):
+        """Get a hex digest identifying the composite for a layout and its images' contents"""
+        digest = hashlib.blake2b(digest_size=16)
+        digest.update(fit_mode.encode())
+        for image_path, monitor in zip(image_paths, monitors):
+            content_hash = self.render_cache.hasher.hash_file(image_path) if image_path else ""
+            digest.update(f"|{monitor}={content_hash}".encode())
+        return digest.hexdigest()
+
+    def cache_path(self, image_paths, monitors, fit_mode):
+        """Get the cache file path of the composite for a layout and its images"""
+        key = self.composite_key(image_paths, monitors, fit_mode)
+        return os.path.join(self.render_cache.cache_dir, f"{COMPOSITE_PREFIX}{key}{RENDER_EXTENSION}")
+
+    def get(self, image_paths, monitors, fit_mode=DEFAULT_FIT_MODE):
+        """Get the path of the composite of one image per monitor, composing it on a cache miss.
+
+        Monitors with an empty image path are left in the background color.
+        """
+        if fit_mode not in FIT_MODES:
+            raise ValueError(f"Unknown fit mode: {fit_mode}")
+        if len(image_paths) != len(monitors):
+            raise ValueError(f"Got {len(image_paths)} images for {len(monitors)} monitors")
+
+        with self._lock:
+            path = self.cache_path(image_paths, monitors, fit_mode)
+            if os.path.exists(path):
+                # Touch the entry so eviction treats it as recently used
+                os.utime(path, None)
+                return path
+
+            from PIL import Image
+            left, top, width, height = virtual_desktop(monitors)
+            canvas = Image.new('RGB', (width, height), BACKGROUND_COLOR)
+            for image_path, (x, y, monitor_width, monitor_height) in zip(image_paths, monitors):
+                if not image_path:
+                    continue
+                # Tiles are cached too, so a new layout only re-renders monitors whose size changed
+                tile_path = self.render_cache.get(image_path, (monitor_width, monitor_height), fit_mode)
+                with Image.open(tile_path) as tile:
+                    canvas.paste(tile, (x - left, y - top))
+
+            temp_path = path + ".tmp"
+            canvas.save(temp_path, "BMP")
+            os.replace(temp_path, path)
+            logging.info(f"Composed wallpaper for {len(monitors)} monitors at {width}x{height}")
+
+            self.render_cache.evict(keep=path)
+            return path
@@ -0,0 +1,69 @@
+import os
+import json
+import time
+import hashlib
+
+# Constants
+GENERATION_KEY = "generation"
+REPLACE_ATTEMPTS = 20
+REPLACE_RETRY_DELAY = 0.05  # seconds
+
+def read_json(path):
+    """Read a JSON file"""
+    with open(path, 'r') as f:
+        return json.load(f)
+
+def content_hash(text):
+    """Get a short hex digest of the text of a config file"""
+    return hashlib.blake2b(text.encode(), digest_size=16).hexdigest()
+
+def read_config_file(path):
+    """Read a JSON config file and return its contents and the content hash of its text"""
+    with open(path, 'r') as f:
+        text = f.read()
+    return json.loads(text), content_hash(text)
+
+def read_generation(path):
+    """Get the generation number stamped in a config file, or 0 if it has none"""
+    try:
+        return int(read_json(path).get(GENERATION_KEY, 0))
+    except (OSError, ValueError, TypeError, AttributeError):
+        return 0
+
+def write_json_atomic(path, data):
+    """Write JSON to a temporary file and rename it over path, so readers never see a partial file"""
+    write_text_atomic(path, json.dumps(data, indent=4))
+
+def write_text_atomic(path, text):
+    """Write text to a temporary file and rename it over path, so readers never see a partial file"""
+    temp_path = f"{path}.{os.getpid()}.tmp"
+    try:
+        with open(temp_path, 'w') as f:
+            f.write(text)
+            f.flush()
+            os.fsync(f.fileno())
+
+        for attempt in range(REPLACE_ATTEMPTS):
+            try:
+                os.replace(temp_path, path)
+                return
+            except PermissionError:
+                # On Windows the rename fails while another process has the file open
+                if attempt == REPLACE_ATTEMPTS - 1:
+                    raise
+                time.sleep(REPLACE_RETRY_DELAY)
+    finally:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+
+def save_config_file(path, data):
+    """Atomically save a config file stamped with the next generation number.
+
+    Returns the generation and the content hash of the written text. The
+    generation is informational only: two writers can stamp the same one, so
+    only the content hash tells whether the file still holds what was written.
+    """
+    generation = read_generation(path) + 1
+    text = json.dumps(dict(data, **{GENERATION_KEY: generation}), indent=4)
+    write_text_atomic(path, text)
+    return generation, content_hash(text)
@@ -0,0 +1,279 @@
+import os
+import sys
+import struct
+import ctypes
+import select
+import logging
+import threading
+
+# Constants
+DEBOUNCE_DELAY = 0.05  # seconds of quiet before a burst of events triggers one callback
+POLL_INTERVAL = 60  # seconds between checks when no native backend is available
+
+class InotifyBackend:
+    """Directory change notifications using Linux inotify"""
+    name = "inotify"
+
+    IN_CLOSE_WRITE = 0x00000008
+    IN_MOVED_TO = 0x00000080
+    IN_CREATE = 0x00000100
+    IN_DELETE = 0x00000200
+    IN_IGNORED = 0x00008000
+    IN_CLOEXEC = 0o2000000
+    EVENT_HEADER = struct.Struct('iIII')
+
+    def __init__(self, directory, filenames):
+        self.filenames = filenames
+        libc = ctypes.CDLL(None, use_errno=True)
+        self.fd = libc.inotify_init1(self.IN_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+
+        mask = self.IN_CLOSE_WRITE | self.IN_MOVED_TO | self.IN_CREATE | self.IN_DELETE
+        if libc.inotify_add_watch(self.fd, os.fsencode(directory), mask) < 0:
+            errno = ctypes.get_errno()
+            os.close(self.fd)
+            raise OSError(errno, f"inotify_add_watch failed for {directory}")
+
+        # Writing to this pipe wakes the blocking select() on shutdown
+        self.stop_read, self.stop_write = os.pipe()
+
+    def run(self, notify):
+        """Block until stopped, calling notify for every change to a watched file"""
+        try:
+            while True:
+                readable, _, _ = select.select([self.fd, self.stop_read], [], [])
+                if self.stop_read in readable:
+                    return
+
+                data = os.read(self.fd, 64 * 1024)
+                offset = 0
+                while offset < len(data):
+                    _, mask, _, name_length = self.EVENT_HEADER.unpack_from(data, offset)
+                    offset += self.EVENT_HEADER.size
+                    name = data[offset:offset + name_length].rstrip(b'\0')
+                    offset += name_length
+
+                    if mask & self.IN_IGNORED:
+                        logging.warning("Configuration directory is no longer watched")
+                        return
+                    if os.fsdecode(name) in self.filenames:
+                        notify()
+        finally:
+            os.close(self.fd)
+
+    def stop(self):
+        """Wake up and end run()"""
+        os.write(self.stop_write, b'x')
+
+    def close(self):
+        """Close both ends of the stop pipe once run() has returned"""
+        os.close(self.stop_read)
+        os.close(self.stop_write)
+
+class WindowsBackend:
+    """Directory change notifications using ReadDirectoryChangesW"""
+    name = "ReadDirectoryChangesW"
+
+    FILE_LIST_DIRECTORY = 0x0001
+    FILE_SHARE_ALL = 0x00000001 | 0x00000002 | 0x00000004
+    OPEN_EXISTING = 3
+    FILE_FLAG_BACKUP_SEMANTICS = 0x02000000
+    FILE_NOTIFY_CHANGE_FILE_NAME = 0x00000001
+    FILE_NOTIFY_CHANGE_SIZE = 0x00000008
+    FILE_NOTIFY_CHANGE_LAST_WRITE = 0x00000010
+    INVALID_HANDLE_VALUE = ctypes.c_void_p(-1).value
+    ERROR_OPERATION_ABORTED = 995
+    RECORD_HEADER = struct.Struct('<III')
+
+    def __init__(self, directory, filenames):
+        from ctypes import wintypes
+
+        self.filenames = {os.path.normcase(name) for name in filenames}
+        self.kernel32 = ctypes.WinDLL('kernel32', use_last_error=True)
+        self.kernel32.CreateFileW.restype = wintypes.HANDLE
+        self.kernel32.CreateFileW.argtypes = [
+            wintypes.LPCWSTR, wintypes.DWORD, wintypes.DWORD, wintypes.LPVOID,
+            wintypes.DWORD, wintypes.DWORD, wintypes.HANDLE
+        ]
+        self.kernel32.ReadDirectoryChangesW.argtypes = [
+            wintypes.HANDLE, wintypes.LPVOID, wintypes.DWORD, wintypes.BOOL, wintypes.DWORD,
+            ctypes.POINTER(wintypes.DWORD), wintypes.LPVOID, wintypes.LPVOID
+        ]
+        self.kernel32.CancelIoEx.argtypes = [wintypes.HANDLE, wintypes.LPVOID]
+        self.kernel32.CloseHandle.argtypes = [wintypes.HANDLE]
+
+        self.handle = self.kernel32.CreateFileW(
+            directory, self.FILE_LIST_DIRECTORY, self.FILE_SHARE_ALL, None,
+            self.OPEN_EXISTING, self.FILE_FLAG_BACKUP_SEMANTICS, None
+        )
+        if self.handle in (None, self.INVALID_HANDLE_VALUE):
+            raise ctypes.WinError(ctypes.get_last_error())
+
+    def run(self, notify):
+        """Block until stopped, calling notify for every change to a watched file"""
+        from ctypes import wintypes
+
+        buffer = ctypes.create_string_buffer(64 * 1024)
+        bytes_returned = wintypes.DWORD()
+        change_filter = (
+            self.FILE_NOTIFY_CHANGE_FILE_NAME |
+            self.FILE_NOTIFY_CHANGE_SIZE |
+            self.FILE_NOTIFY_CHANGE_LAST_WRITE
+        )
+        try:
+            while True:
+                ok = self.kernel32.ReadDirectoryChangesW(
+                    self.handle, buffer, len(buffer), False, change_filter,
+                    ctypes.byref(bytes_returned), None, None
+                )
+                if not ok:
+                    error = ctypes.get_last_error()
+                    if error != self.ERROR_OPERATION_ABORTED:
+                        logging.error(f"ReadDirectoryChangesW failed: {ctypes.FormatError(error)}")
+                    return
+
+                # Zero bytes means the buffer overflowed, so assume our files changed
+                if bytes_returned.value == 0:
+                    notify()
+                    continue
+
+                data = buffer.raw[:bytes_returned.value]
+                offset = 0
+                while True:
+                    next_offset, _, name_length = self.RECORD_HEADER.unpack_from(data, offset)
+                    start = offset + self.RECORD_HEADER.size
+                    name = data[start:start + name_length].decode('utf-16-le')
+                    if os.path.normcase(name) in self.filenames:
+                        notify()
+                    if next_offset == 0:
+                        break
+                    offset += next_offset
+        finally:
+            self.kernel32.CloseHandle(self.handle)
+
+    def stop(self):
+        """Cancel the pending ReadDirectoryChangesW call to end run()"""
+        self.kernel32.CancelIoEx(self.handle, None)
+
+    def close(self):
+        """Nothing to release; run() closes the directory handle"""
+
+class PollingBackend:
+    """Fallback that compares modification times and sizes at a fixed interval"""
+    name = "polling"
+
+    def __init__(self, paths, interval):
+        self.paths = paths
+        self.interval = interval
+        self.stop_event = threading.Event()
+
+    def snapshot(self):
+        """Get the modification time and size of every watched file"""
+        result = []
+        for path in self.paths:
+            try:
+                stat = os.stat(path)
+                result.append((stat.st_mtime_ns, stat.st_size))
+            except OSError:
+                result.append(None)
+        return result
+
+    def run(self, notify):
+        """Poll until stopped, calling notify whenever a watched file changes"""
+        last_snapshot = self.snapshot()
+        while not self.stop_event.wait(self.interval):
+            current_snapshot = self.snapshot()
+            if current_snapshot != last_snapshot:
+                last_snapshot = current_snapshot
+                notify()
+
+    def stop(self):
+        """End run() at the next interval"""
+        self.stop_event.set()
+
+    def close(self):
+        """Nothing to release"""
+
+class ConfigWatcher:
+    """Watch configuration files and call back once for each burst of changes"""
+    def __init__(self, paths, callback, poll_interval=POLL_INTERVAL):
+        self.paths = [os.path.abspath(path) for path in paths]
+        self.directory = os.path.dirname(self.paths[0])
+        self.filenames = {os.path.basename(path) for path in self.paths}
+        self.callback = callback
+        self.poll_interval = poll_interval
+        self.backend = None
+        self.pending = threading.Event()
+        self.stop_event = threading.Event()
+        self.lock = threading.Lock()  # Serializes stop() with replacing or closing the backend
+
+    def create_backend(self):
+        """Create the native backend for this platform, falling back to polling"""
+        try:
+            if sys.platform == 'win32':
+                return WindowsBackend(self.directory, self.filenames)
+            if sys.platform.startswith('linux'):
+                return InotifyBackend(self.directory, self.filenames)
+        except Exception as e:
+            logging.warning(f"Native config watcher unavailable, using polling: {e}")
+        return PollingBackend(self.paths, self.poll_interval)
+
+    @property
+    def is_native(self):
+        """True when changes are delivered by the operating system instead of polling"""
+        return self.backend is not None and not isinstance(self.backend, PollingBackend)
+
+    def start(self):
+        """Start watching in background threads"""
+        self.backend = self.create_backend()
+        threading.Thread(target=self._watch, daemon=True).start()
+        threading.Thread(target=self._dispatch, daemon=True).start()
+        logging.info(f"Watching configuration files with {self.backend.name} backend")
+
+    def stop(self):
+        """Stop watching"""
+        with self.lock:
+            if self.stop_event.is_set():
+                return
+            self.stop_event.set()
+            self.pending.set()
+            if self.backend:
+                self.backend.stop()
+
+    def _watch(self):
+        while True:
+            try:
+                self.backend.run(self.pending.set)
+            except Exception as e:
+                logging.error(f"Error in config watcher: {e}")
+            with self.lock:
+                # The backend is never run again, whether stopped or abandoned below
+                self.backend.close()
+                if self.stop_event.is_set() or not self.is_native:
+                    return
+
+                # The native watch ended on its own, e.g. because the directory was moved or unmounted
+                logging.warning(
+                    f"{self.backend.name} config watcher stopped, polling every {self.poll_interval}s instead"
+                )
+                self.backend = PollingBackend(self.paths, self.poll_interval)
+            # Changes may have been missed while the watch was ending
+            self.pending.set()
+
+    def _dispatch(self):
+        """Coalesce bursts of change events into a single callback"""
+        while not self.stop_event.is_set():
+            self.pending.wait()
+
+            # Wait until no further events arrive within the debounce delay
+            while self.pending.is_set() and not self.stop_event.is_set():
+                self.pending.clear()
+                self.stop_event.wait(DEBOUNCE_DELAY)
+
+            if self.stop_event.is_set():
+                return
+            try:
+                self.callback()
+            except Exception as e:
+                logging.error(f"Error handling configuration change: {e}")
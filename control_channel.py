@@ -0,0 +1,186 @@
+import os
+import sys
+import logging
+import stat
+import secrets
+import tempfile
+import threading
+from multiprocessing import AuthenticationError
+from multiprocessing.connection import Listener, Client
+
+# Constants
+CHANNEL_NAME = "TimeBG"
+KEY_FILE = "control.key"
+SOCKET_FILE = "control.sock"
+RESPONSE_TIMEOUT = 5  # seconds a client waits for the daemon to answer
+
+class ControlError(Exception):
+    """A control command failed or no daemon is listening"""
+
+def get_control_dir():
+    """Get the private per-user directory holding the control socket and key"""
+    if sys.platform == 'win32':
+        base = os.environ.get('LOCALAPPDATA') or tempfile.gettempdir()
+        directory = os.path.join(base, CHANNEL_NAME)
+    else:
+        base = os.environ.get('XDG_RUNTIME_DIR') or tempfile.gettempdir()
+        directory = os.path.join(base, f"{CHANNEL_NAME.lower()}-{os.getuid()}")
+    os.makedirs(directory, mode=0o700, exist_ok=True)
+    if sys.platform != 'win32':
+        check_private_dir(directory)
+    return directory
+
+def check_private_dir(directory):
+    """Raise ControlError unless directory is a real directory owned by and private to the current user.
+
+    Without XDG_RUNTIME_DIR the control directory has a predictable name in the
+    shared temp directory, so another user may have created it first.
+    """
+    info = os.lstat(directory)
+    if stat.S_ISLNK(info.st_mode) or not stat.S_ISDIR(info.st_mode):
+        raise ControlError(f"Refusing to use {directory}: not a directory")
+    if info.st_uid != os.getuid():
+        raise ControlError(f"Refusing to use {directory}: owned by another user")
+    if info.st_mode & 0o077:
+        raise ControlError(f"Refusing to use {directory}: accessible by other users")
+
+def get_control_address():
+    """Get the named pipe or Unix socket address of the control channel"""
+    if sys.platform == 'win32':
+        user = os.environ.get('USERNAME', 'user')
+        return rf"\\.\pipe\{CHANNEL_NAME}-{user}"
+    return os.path.join(get_control_dir(), SOCKET_FILE)
+
+def get_family():
+    """Get the multiprocessing.connection address family for this platform"""
+    return 'AF_PIPE' if sys.platform == 'win32' else 'AF_UNIX'
+
+def read_authkey():
+    """Read the shared secret clients use to authenticate"""
+    with open(os.path.join(get_control_dir(), KEY_FILE), 'rb') as f:
+        return f.read()
+
+def create_authkey():
+    """Create a fresh shared secret readable only by the current user"""
+    directory = get_control_dir()
+    authkey = secrets.token_bytes(32)
+    # mkstemp creates a new 0600 file with O_EXCL, and the rename replaces
+    # whatever is at the key path, a symlink included, without following it
+    fd, temp_path = tempfile.mkstemp(prefix=f"{KEY_FILE}.", dir=directory)
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(authkey)
+        os.replace(temp_path, os.path.join(directory, KEY_FILE))
+    finally:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+    return authkey
+
+def send_command(command, *args, timeout=RESPONSE_TIMEOUT):
+    """Send a command to the running daemon and return its result.
+
+    Every failure to reach the daemon or to get its answer, including one
+    that dies mid-request or a stale key, is raised as ControlError.
+    """
+    try:
+        with Client(get_control_address(), family=get_family(), authkey=read_authkey()) as connection:
+            connection.send({"command": command, "args": list(args)})
+            if not connection.poll(timeout):
+                raise ControlError(f"No response to '{command}' within {timeout}s")
+            response = connection.recv()
+    except (FileNotFoundError, ConnectionRefusedError) as e:
+        raise ControlError(f"TimeBG is not running: {e}") from e
+    except AuthenticationError as e:
+        raise ControlError(f"Could not authenticate with TimeBG, its key may be stale: {e}") from e
+    except (OSError, EOFError) as e:
+        raise ControlError(f"Lost the connection to TimeBG during '{command}': {e}") from e
+
+    if not isinstance(response, dict):
+        raise ControlError(f"Invalid response to '{command}': {response!r}")
+    if not response.get("ok"):
+        raise ControlError(response.get("error", "Unknown error"))
+    return response.get("result")
+
+def is_daemon_running():
+    """Check whether a daemon answers on the control channel"""
+    try:
+        send_command("ping")
+        return True
+    except ControlError:
+        return False
+
+class ControlServer:
+    """Answer commands from local clients on a named pipe or Unix socket.
+
+    handlers maps command names to callables. Each connection carries one
+    request and one response, both small picklable dicts, and is served on
+    its own short-lived thread so a slow client cannot block the others.
+    """
+    def __init__(self, handlers):
+        self.handlers = dict(handlers, ping=lambda: "pong")
+        self.address = get_control_address()
+        self.authkey = None
+        self.listener = None
+        self.stop_event = threading.Event()
+
+    def start(self):
+        """Start listening in a background thread"""
+        if get_family() == 'AF_UNIX' and os.path.exists(self.address):
+            # A socket file left behind by a daemon that did not shut down cleanly
+            if is_daemon_running():
+                raise ControlError("Another daemon is already listening")
+            os.remove(self.address)
+
+        self.authkey = create_authkey()
+        self.listener = Listener(self.address, family=get_family(), authkey=self.authkey)
+        threading.Thread(target=self._serve, daemon=True).start()
+        logging.info(f"Control channel listening on {self.address}")
+
+    def stop(self):
+        """Stop listening and remove the socket"""
+        if self.listener is None:
+            return
+        self.stop_event.set()
+        try:
+            # accept() is not interrupted by close(), so wake it with a connection
+            Client(self.address, family=get_family(), authkey=self.authkey).close()
+        except (OSError, EOFError):
+            pass
+        self.listener.close()
+        self.listener = None
+
+    def _serve(self):
+        while not self.stop_event.is_set():
+            try:
+                connection = self.listener.accept()
+            except Exception as e:
+                if self.stop_event.is_set():
+                    return
+                logging.warning(f"Rejected control connection: {e}")
+                continue
+            threading.Thread(target=self._handle, args=(connection,), daemon=True).start()
+
+    def _handle(self, connection):
+        """Run one request and send back its result or error"""
+        with connection:
+            try:
+                if not connection.poll(RESPONSE_TIMEOUT):
+                    return
+                request = connection.recv()
+                command = request.get("command")
+                handler = self.handlers.get(command)
+                if handler is None:
+                    response = {"ok": False, "error": f"Unknown command: {command}"}
+                else:
+                    logging.info(f"Control command: {command}")
+                    response = {"ok": True, "result": handler(*request.get("args", []))}
+            except (EOFError, OSError):
+                return
+            except Exception as e:
+                logging.error(f"Error handling control command: {e}")
+                response = {"ok": False, "error": str(e)}
+
+            try:
+                connection.send(response)
+            except (EOFError, OSError):
+                pass
@@ -0,0 +1,120 @@
+import os
+import logging
+import threading
+from render_cache import RENDER_EXTENSION
+
+# Constants
+FRAME_RATE = 8  # Crossfade frames per second; every frame is a full wallpaper apply
+MAX_FRAMES = 48
+FRAME_PREFIX = "fade_"
+FRAME_DIR = "crossfade_cache"  # Created in the application directory, next to render_cache
+DEFAULT_BUDGET_MB = 128  # Disk space for the frames of one transition
+BMP_HEADER_BYTES = 54
+
+def frame_count(seconds):
+    """Get the number of intermediate frames for a crossfade lasting seconds, or 0 for none"""
+    if seconds <= 0:
+        return 0
+    return max(1, min(MAX_FRAMES, round(seconds * FRAME_RATE)))
+
+def frame_bytes(size):
+    """Get the file size of a 24-bit BMP frame, whose rows are padded to 4 bytes"""
+    width, height = size
+    return BMP_HEADER_BYTES + (width * 3 + 3) // 4 * 4 * height
+
+class CrossfadeCache:
+    """Intermediate frames blending one display-sized wallpaper into the next.
+
+    Frames are blended off the timer thread, ahead of the transition, into a
+    directory of their own, so they never push rendered wallpapers out of the
+    render cache. Only the frames of one transition are kept, capped by a byte
+    budget: large displays get fewer frames instead of more disk. Playing a
+    crossfade only applies files that already exist, and discards them after.
+    """
+    def __init__(self, frame_dir, hasher, budget_bytes=DEFAULT_BUDGET_MB * 1024 * 1024):
+        self.frame_dir = frame_dir
+        self.hasher = hasher
+        self.budget_bytes = budget_bytes
+        self._prepared = None  # (from_path, to_path, frame paths) of the blended transition
+        self._lock = threading.Lock()
+        os.makedirs(self.frame_dir, exist_ok=True)
+        # Frames left behind by an earlier run are never played
+        self.discard()
+
+    def max_steps(self, size):
+        """Get the number of frames of a size that fit in the budget"""
+        return self.budget_bytes // frame_bytes(size)
+
+    def frame_paths(self, from_path, to_path, steps):
+        """Get the file paths of the frames between two wallpapers"""
+        prefix = f"{FRAME_PREFIX}{self.hasher.hash_file(from_path)}_{self.hasher.hash_file(to_path)}"
+        return [
+            os.path.join(self.frame_dir, f"{prefix}_{step}of{steps}{RENDER_EXTENSION}")
+            for step in range(1, steps + 1)
+        ]
+
+    def cached_frames(self, from_path, to_path):
+        """Get the frame paths if the transition between two wallpapers is blended, otherwise None; never blends"""
+        with self._lock:
+            prepared = self._prepared
+        if prepared is None or prepared[:2] != (from_path, to_path):
+            return None
+        paths = prepared[2]
+        return paths if all(os.path.exists(path) for path in paths) else None
+
+    def get(self, from_path, to_path, steps):
+        """Get the frame paths between two wallpapers, blending the missing ones.
+
+        Frames of any other transition are deleted first. Returns None when the
+        wallpapers differ in size or not even one frame fits in the budget.
+        """
+        with self._lock:
+            prepared = self._prepared
+            if prepared is not None and prepared[:2] == (from_path, to_path) and all(
+                os.path.exists(path) for path in prepared[2]
+            ):
+                return prepared[2]
+
+            from PIL import Image
+            with Image.open(from_path) as image:
+                start = image.convert('RGB')
+            with Image.open(to_path) as image:
+                end = image.convert('RGB')
+            if start.size != end.size:
+                logging.info(f"Not blending {from_path} into {to_path}: sizes differ")
+                return None
+
+            steps = min(steps, self.max_steps(start.size))
+            if steps < 1:
+                logging.info(f"Not blending {from_path} into {to_path}: frames exceed the crossfade budget")
+                return None
+
+            paths = self.frame_paths(from_path, to_path, steps)
+            self._remove_frames(keep=set(paths))
+            missing = [(step, path) for step, path in enumerate(paths, 1) if not os.path.exists(path)]
+            for step, path in missing:
+                # Image.blend runs over whole rows in C, so each frame is one pass over the pixels
+                frame = Image.blend(start, end, step / (steps + 1))
+                temp_path = path + ".tmp"
+                frame.save(temp_path, "BMP")
+                os.replace(temp_path, path)
+            if missing:
+                logging.info(f"Blended {len(missing)} crossfade frames at {start.size[0]}x{start.size[1]}")
+
+            self._prepared = (from_path, to_path, paths)
+            return paths
+
+    def discard(self):
+        """Delete every blended frame, for example once a crossfade has played"""
+        with self._lock:
+            self._prepared = None
+            self._remove_frames()
+
+    def _remove_frames(self, keep=()):
+        for entry in os.scandir(self.frame_dir):
+            if not entry.name.startswith(FRAME_PREFIX) or entry.path in keep:
+                continue
+            try:
+                os.remove(entry.path)
+            except OSError as e:
+                logging.warning(f"Could not remove crossfade frame {entry.path}: {e}")
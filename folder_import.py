@@ -0,0 +1,134 @@
+import os
+import copy
+import datetime
+from concurrent.futures import ProcessPoolExecutor
+from schedule import MINUTES_PER_DAY, compile_dated_index, uses_solar_time_points
+from calendar_rules import CalendarRules
+from solar import configured_location, solar_times
+
+# Constants
+IMAGE_EXTENSIONS = (".jpg", ".jpeg", ".png", ".bmp")
+EXIF_IFD = 0x8769
+DATETIME_ORIGINAL = 36867
+DATETIME = 306
+EXIF_TIME_FORMAT = "%Y:%m:%d %H:%M:%S"
+PARALLEL_THRESHOLD = 64  # Smaller folders are scanned in-process; starting workers would cost more
+CHUNKS_PER_WORKER = 4
+
+def find_images(folder):
+    """List the image files directly inside a folder, sorted by name"""
+    return sorted(
+        entry.path for entry in os.scandir(os.path.abspath(folder))
+        if entry.is_file() and entry.name.lower().endswith(IMAGE_EXTENSIONS)
+    )
+
+def read_capture_time(image_path):
+    """Get when a photo was taken and where that came from: EXIF DateTimeOriginal, DateTime or the file's mtime.
+
+    Runs in worker processes, so it only needs this module and Pillow.
+    Pillow reads the EXIF block without decoding any pixels. A file that
+    cannot be read at all gets no time and an "unreadable" source, so one bad
+    file never aborts the scan.
+    """
+    try:
+        from PIL import Image
+        with Image.open(image_path) as image:
+            exif = image.getexif()
+        for value, source in (
+            (exif.get_ifd(EXIF_IFD).get(DATETIME_ORIGINAL), "DateTimeOriginal"),
+            (exif.get(DATETIME), "DateTime"),
+        ):
+            if value:
+                try:
+                    return image_path, datetime.datetime.strptime(str(value).strip('\0 '), EXIF_TIME_FORMAT), source
+                except ValueError:
+                    pass
+    except Exception:
+        pass
+    try:
+        return image_path, datetime.datetime.fromtimestamp(os.path.getmtime(image_path)), "mtime"
+    except (OSError, ValueError, OverflowError) as e:
+        return image_path, None, f"unreadable: {e}"
+
+def scan_folder(folder, workers=None, mp_context=None):
+    """Read the capture time of every image in a folder, in parallel for large folders.
+
+    mp_context selects how worker processes start, e.g. a "spawn" context when the
+    caller has other threads running and forking would be unsafe.
+    """
+    image_paths = find_images(folder)
+    if len(image_paths) < PARALLEL_THRESHOLD:
+        return [read_capture_time(path) for path in image_paths]
+
+    workers = workers or os.cpu_count() or 1
+    chunksize = max(1, len(image_paths) // (workers * CHUNKS_PER_WORKER))
+    with ProcessPoolExecutor(max_workers=workers, mp_context=mp_context) as executor:
+        return list(executor.map(read_capture_time, image_paths, chunksize=chunksize))
+
+def schedule_compiler(time_ranges, schedules=(), settings=None):
+    """Get a function compiling the index of a date the way the wallpaper monitor does.
+
+    Calendar rules from schedules are layered over the time ranges, and solar
+    time points resolve at the location in settings. Indexes are memoized by
+    date, since photos usually share a few days.
+    """
+    calendar = CalendarRules(schedules, time_ranges) if schedules else None
+    solar_times_for = None
+    if uses_solar_time_points(calendar.all_time_ranges() if calendar else time_ranges):
+        location = configured_location(settings or {})
+        if location is not None:
+            solar_times_for = lambda date: solar_times(*location, date)
+
+    indexes = {}
+
+    def schedule_for(date):
+        index = indexes.get(date)
+        if index is None:
+            index = indexes[date] = compile_dated_index(date, time_ranges, calendar, solar_times_for)
+        return index
+
+    return schedule_for
+
+def assign_images(time_ranges, captures, schedules=(), settings=None):
+    """Assign captured images to the ranges their capture time falls into.
+
+    Uses the same lookup as the wallpaper monitor, so a photo lands in the
+    range that would be shown at that moment, including ranges of calendar
+    rules and ranges with solar time points. When several photos fall into
+    one range, the one taken closest to the middle of the range's stretch
+    wins. Ranges without a matching photo keep their current image.
+    Returns new time ranges, new schedules and the number of ranges that got an image.
+    """
+    schedule_for = schedule_compiler(time_ranges, schedules, settings)
+    best = {}  # id of range -> (distance from midpoint, image path)
+    for image_path, taken, _ in captures:
+        if taken is None:
+            continue
+        schedule = schedule_for(taken.date())
+        minute = taken.hour * 60 + taken.minute
+        time_range = schedule.lookup(minute)
+        if time_range is None:
+            continue
+        start, length = schedule.span_at(minute)
+        offset = abs(minute - (start + length // 2) % MINUTES_PER_DAY)
+        distance = min(offset, MINUTES_PER_DAY - offset)
+        candidate = (distance, image_path)
+        if id(time_range) not in best or candidate < best[id(time_range)]:
+            best[id(time_range)] = candidate
+
+    def assigned(ranges):
+        new_ranges = []
+        for time_range in ranges:
+            new_range = dict(time_range) if isinstance(time_range, dict) else time_range
+            if id(time_range) in best:
+                new_range["image"] = best[id(time_range)][1]
+            new_ranges.append(new_range)
+        return new_ranges
+
+    new_schedules = []
+    for schedule in schedules:
+        new_schedule = copy.deepcopy(schedule)
+        if isinstance(schedule, dict) and isinstance(schedule.get("time_ranges"), list):
+            new_schedule["time_ranges"] = assigned(schedule["time_ranges"])
+        new_schedules.append(new_schedule)
+    return assigned(time_ranges), new_schedules, len(best)
@@ -1,21 +1,28 @@
+import time
+STARTUP_TIME = time.perf_counter()  # Reference point for --startup-profile
+
 import os
 import sys
-import time
 import json
 import ctypes
 import datetime
-import tkinter as tk
-from tkinter import filedialog
-from tkinter import messagebox
-from pathlib import Path
-import winreg as reg
 import threading
 import logging
-import pystray
-from PIL import Image, ImageDraw
-import tempfile
-import subprocess
 import traceback
+from schedule import (
+    ScheduleIndex, MINUTES_PER_DAY, parse_time_point, schedule_geometry, transition_timestamp, uses_solar_time_points,
+    compile_dated_index
+)
+from solar import is_solar_time_point, configured_location
+from calendar_rules import CalendarRules
+from config_watcher import ConfigWatcher
+from config_store import read_config_file, save_config_file, GENERATION_KEY
+from render_cache import RenderCache, ContentHasher, DEFAULT_FIT_MODE, DEFAULT_BUDGET_MB
+from composite import CompositeCache, sort_monitors, monitor_images, configured_images
+from crossfade import CrossfadeCache, frame_count, FRAME_DIR
+from wallpaper_backends import get_backend, RecordingBackend, TimedBackend
+from clock import SystemClock, SimulatedClock
+from metrics import MetricsRegistry, LATENESS_BUCKETS, DEFAULT_DUMP_INTERVAL
 
 # Get application path for both script and frozen exe
 def get_application_path():
@@ -36,23 +43,97 @@ logging.basicConfig(
     filemode='a'
 )
 
+def show_error(title, message):
+    """Show an error dialog without loading tkinter where a native dialog is available"""
+    if sys.platform == 'win32':
+        # MB_ICONERROR = 0x10
+        ctypes.windll.user32.MessageBoxW(None, message, title, 0x10)
+        return
+    from tkinter import messagebox
+    messagebox.showerror(title, message)
+
+class StartupProfiler:
+    """Records how long each phase of startup takes"""
+    def __init__(self, start=STARTUP_TIME):
+        self.last = start
+        self.phases = []
+    
+    def mark(self, phase):
+        """Record the time elapsed since the previous mark as the given phase"""
+        now = time.perf_counter()
+        self.phases.append((phase, now - self.last))
+        self.last = now
+    
+    def report(self):
+        """Get a printable table of the recorded phases"""
+        lines = [f"{phase:<24}{seconds * 1000:10.1f} ms" for phase, seconds in self.phases]
+        total = sum(seconds for _, seconds in self.phases)
+        lines.append(f"{'total':<24}{total * 1000:10.1f} ms")
+        return "\n".join(lines)
+
 # Constants
 CONFIG_FILE = "images_config.json"
 TIME_POINTS_CONFIG_FILE = "time_points_config.json"
-CHECK_INTERVAL = 60  # seconds
+RENDER_CACHE_DIR = "render_cache"
+CHECK_INTERVAL = 60  # seconds between configuration file checks when polling
+PREFETCH_LEAD = 30  # seconds before a transition to warm up the next wallpaper
+MAX_MONITOR_SLEEP = 600  # seconds; bounds drift after clock changes or resume from sleep
+RENDER_SETTINGS = ("backend", "fit_mode", "render_cache_mb")  # Settings that change how wallpapers look
+LOCATION_SETTINGS = ("latitude", "longitude")  # Settings that move solar time points
+DATED_SCHEDULE_CACHE = 16  # Compiled indexes kept for schedules that differ by day
+TRANSITION_SEARCH_DAYS = 8  # Days ahead to look for a change when whole days share one range
 
 class TimeBasedBackground:
-    def __init__(self):
+    def __init__(self, clock=None, profiler=None, instance_lock=None):
+        self.clock = clock or SystemClock()
+        self.profiler = profiler or StartupProfiler()
+        self.instance_lock = instance_lock  # Held while this is the primary instance
         self.app_path = get_application_path()
         self.config_path = os.path.join(self.app_path, CONFIG_FILE)
         self.time_points_config_path = os.path.join(self.app_path, TIME_POINTS_CONFIG_FILE)
         logging.info(f"Config path: {self.config_path}")
         logging.info(f"Time points config path: {self.time_points_config_path}")
         self.time_ranges = []
+        self.settings = {}  # Optional "settings" section of the image configuration
+        self.schedule = ScheduleIndex([])  # Compiled lookup for time_ranges
+        self.schedules = []  # Optional calendar rules layered over time_ranges
+        self.calendar = None  # Compiled calendar rules, if there are any
+        self.schedule_uses_solar = False
+        self.schedule_is_dated = False  # True when solar time points or calendar rules make the lookup differ by day
+        self.dated_schedules = {}  # schedule_key() -> ScheduleIndex, for dated schedules only
+        self.render_cache = None
+        self.composite_cache = None  # Spanning wallpapers for ranges with one image per monitor
+        self.crossfade_cache = None  # Blended frames between consecutive wallpapers
+        self.backend = None
+        self.hasher = ContentHasher()  # Shared by the render cache and change detection
         self.current_bg = None
+        self.current_bg_identity = None  # Content hash or composite key of the applied wallpaper
+        self.current_bg_file = None  # Absolute path of the file the backend last applied
+        self.prefetch_enabled = True
+        self.preflight_enabled = True  # Validate every configured image after loading or saving
+        self.image_validator = None
+        self.preflight_checks = None  # Results of the last preflight validation
+        self.missing_images = set()  # Missing images already reported, to log each only once
+        self.prefetched_transition = None  # Transition the next wallpaper was warmed up for
+        self.prefetched_image = None
         self.icon = None
+        self.icon_atlas = None  # Pre-rendered clock hands for the tray icon
         self.stop_event = threading.Event()
+        self.wake_event = threading.Event()  # Set to wake the monitor thread early
         self.last_config_modified = 0  # Track last modification time
+        self.config_generation = None  # Generation stamp of the loaded configuration, for status only
+        self.config_hash = None  # Content hash of the config text the live configuration was loaded from or saved as
+        self.config_watcher = None
+        self.poll_config = True  # Cap monitor sleeps so the config file is checked regularly
+        self.max_monitor_sleep = MAX_MONITOR_SLEEP  # Longest sleep without a transition or config poll
+        self.config_changed = threading.Event()  # Set by the config watcher or a reload command
+        self.force_apply = threading.Event()  # Set to re-apply the wallpaper on the next monitor pass
+        self.paused = threading.Event()  # While set, the wallpaper is left alone
+        self.control_server = None
+        self.reconfigure_host = None  # Hosts the reconfiguration window once it is first opened
+        self.metrics = MetricsRegistry()
+        self.metrics.set_gauge("start_time_seconds", time.time())
+        self.expected_transition = None  # Transition the monitor expects to wake up for next
         
     def load_config(self):
         """Load image configuration file if exists"""
@@ -61,10 +142,10 @@ class TimeBasedBackground:
                 # Update last modified time
                 self.last_config_modified = os.path.getmtime(self.config_path)
                 
-                with open(self.config_path, 'r') as f:
-                    config = json.load(f)
-                    self.time_ranges = config.get('time_ranges', [])
+                config, self.config_hash = read_config_file(self.config_path)
+                self.apply_config(config)
                 logging.info(f"Loaded configuration with {len(self.time_ranges)} time ranges")
+                self.start_preflight()
                 return True
             except Exception as e:
                 logging.error(f"Error loading configuration: {e}")
@@ -73,6 +154,30 @@ class TimeBasedBackground:
             logging.info("Configuration file does not exist")
             return False
     
+    def apply_config(self, config):
+        """Use the contents of an image configuration file"""
+        time_ranges = config.get('time_ranges', [])
+        old_location = [self.settings.get(key) for key in LOCATION_SETTINGS]
+        old_schedules = self.schedules
+        self.settings = config.get('settings', {})
+        self.schedules = config.get('schedules', [])
+        self.config_generation = config.get(GENERATION_KEY)
+        location_changed = old_location != [self.settings.get(key) for key in LOCATION_SETTINGS]
+        
+        # Calendar rules are compiled together with the base ranges, so any change to them recompiles
+        if not self.schedules and not old_schedules and schedule_geometry(time_ranges) == schedule_geometry(self.time_ranges) and not (
+            self.schedule_uses_solar and location_changed
+        ):
+            # Only images changed, so the compiled boundaries still hold
+            self.time_ranges = time_ranges
+            self.schedule = self.schedule.rebind(time_ranges)
+            self.dated_schedules = {
+                date: index.rebind(time_ranges) for date, index in self.dated_schedules.items()
+            }
+        else:
+            self.time_ranges = time_ranges
+            self.compile_schedule()
+    
     def load_time_points_config(self):
         """Load time points configuration file if exists"""
         if os.path.exists(self.time_points_config_path):
@@ -92,8 +197,7 @@ class TimeBasedBackground:
     def save_time_points_config(self, time_points):
         """Save time points configuration to file"""
         try:
-            with open(self.time_points_config_path, 'w') as f:
-                json.dump({'time_points': time_points}, f, indent=4)
+            save_config_file(self.time_points_config_path, {'time_points': time_points})
             logging.info("Time points configuration saved successfully")
             return True
         except Exception as e:
@@ -103,17 +207,124 @@ class TimeBasedBackground:
     def save_config(self):
         """Save image configuration file"""
         try:
-            with open(self.config_path, 'w') as f:
-                json.dump({'time_ranges': self.time_ranges}, f, indent=4)
+            config = {'time_ranges': self.time_ranges}
+            if self.schedules:
+                config['schedules'] = self.schedules
+            if self.settings:
+                config['settings'] = self.settings
+            # Remember what we wrote so the watcher does not reload our own save
+            self.config_generation, self.config_hash = save_config_file(self.config_path, config)
+            self.compile_schedule()
             logging.info("Configuration saved successfully")
+            self.start_preflight()
             return True
         except Exception as e:
             logging.error(f"Error saving configuration: {e}")
             return False
     
+    def get_image_validator(self):
+        """Get the image validator, creating it on first use"""
+        if self.image_validator is None:
+            from preflight import ImageValidator
+            self.image_validator = ImageValidator()
+        return self.image_validator
+    
+    def check_images(self, time_ranges):
+        """Validate the images of a list of time ranges concurrently and return the checks and a report"""
+        from preflight import log_report
+        
+        try:
+            backend = self.get_wallpaper_backend()
+        except Exception as e:
+            # Checking the images themselves does not need a backend, so never block a save on one
+            logging.warning(f"Validating images without a wallpaper backend: {e}")
+            display_size, supported_formats = None, None
+        else:
+            display_size = backend.get_display_size()
+            # Rendered wallpapers are always BMP, so the source format only matters without rendering
+            supported_formats = None if display_size else backend.supported_formats
+        images = [image for time_range in time_ranges for image in configured_images(time_range)]
+        checks = self.get_image_validator().check_images(images, supported_formats, display_size)
+        return checks, log_report(checks, time_ranges)
+    
+    def run_preflight(self):
+        """Validate every configured image and report problems before their time slot arrives"""
+        try:
+            checks, _ = self.check_images(self.all_time_ranges())
+            self.preflight_checks = checks
+            problems = sum(1 for check in checks if not check.ok)
+            if problems and self.icon is not None:
+                self.icon.notify(f"{problems} configured images cannot be used. See timebased_bg.log for details.", "TimeBG")
+        except Exception as e:
+            logging.error(f"Error validating images: {e}")
+    
+    def start_preflight(self):
+        """Validate every configured image in the background"""
+        if self.preflight_enabled:
+            threading.Thread(target=self.run_preflight, daemon=True).start()
+    
+    def update_time_ranges(self, time_ranges, schedules=None):
+        """Save edited time ranges, and calendar rules unless None, and have the monitor thread switch to them.
+
+        Called from the hosted reconfiguration window and control commands, so
+        the live schedule is not touched here. The file is written and the
+        monitor picks it up through check_config_updated, like any other edit.
+        """
+        config = {'time_ranges': time_ranges}
+        schedules = self.schedules if schedules is None else schedules
+        if schedules:
+            config['schedules'] = schedules
+        if self.settings:
+            config['settings'] = self.settings
+        try:
+            save_config_file(self.config_path, config)
+        except Exception as e:
+            logging.error(f"Error saving configuration: {e}")
+            return False
+        logging.info("Configuration saved, reloading it on the monitor thread")
+        self.on_config_changed()
+        return True
+    
+    def import_folder(self, folder):
+        """Assign the photos in a folder to time ranges by capture time and save the result"""
+        from folder_import import scan_folder, assign_images
+        
+        time_ranges = self.time_ranges
+        if not time_ranges:
+            # No images configured yet, so start from the saved time points
+            time_points = self.load_time_points_config() or []
+            time_ranges = [
+                {"start": start, "end": time_points[(i + 1) % len(time_points)], "image": ""}
+                for i, start in enumerate(time_points)
+            ]
+        if not time_ranges:
+            logging.error("No time ranges or time points configured to import into")
+            return None
+        
+        start = time.perf_counter()
+        captures = scan_folder(folder)
+        skipped = [(image_path, source) for image_path, taken, source in captures if taken is None]
+        for image_path, source in skipped:
+            logging.warning(f"Skipped {image_path}: {source}")
+        # Same calendar rules and solar times as the live lookup, so rule ranges get photos too
+        new_time_ranges, new_schedules, assigned = assign_images(time_ranges, captures, self.schedules, self.settings)
+        logging.info(
+            f"Scanned {len(captures)} images in {folder} in {time.perf_counter() - start:.2f}s, "
+            f"assigned images to {assigned} of {len(new_time_ranges)} time ranges, skipped {len(skipped)}"
+        )
+        if assigned and not self.update_time_ranges(new_time_ranges, new_schedules):
+            return None
+        return len(captures), assigned, len(skipped)
+    
     def add_to_startup(self):
         """Add application to Windows startup"""
+        if sys.platform != 'win32':
+            logging.info("Startup integration is only available on Windows")
+            return False
+        
         try:
+            import winreg as reg
+            
             key = reg.HKEY_CURRENT_USER
             key_path = r"SOFTWARE\Microsoft\Windows\CurrentVersion\Run"
             
@@ -137,51 +348,408 @@ class TimeBasedBackground:
             logging.error(f"Error adding to startup: {e}")
             return False
     
+    def get_wallpaper_backend(self):
+        """Get the wallpaper backend, creating it on first use"""
+        if self.backend is None:
+            self.backend = get_backend(self.settings.get("backend"), self.metrics)
+        return self.backend
+    
+    def get_render_cache(self):
+        """Get the render cache, creating it on first use"""
+        if self.render_cache is None:
+            budget_mb = self.settings.get("render_cache_mb", DEFAULT_BUDGET_MB)
+            self.render_cache = RenderCache(
+                os.path.join(self.app_path, RENDER_CACHE_DIR),
+                budget_bytes=int(budget_mb * 1024 * 1024),
+                hasher=self.hasher
+            )
+        return self.render_cache
+    
+    def get_composite_cache(self):
+        """Get the composite cache, creating it on first use"""
+        if self.composite_cache is None:
+            self.composite_cache = CompositeCache(self.get_render_cache())
+        return self.composite_cache
+    
+    def get_crossfade_cache(self):
+        """Get the crossfade frame cache, creating it on first use"""
+        if self.crossfade_cache is None:
+            # Frames live outside the render cache so a fade never evicts rendered wallpapers
+            self.crossfade_cache = CrossfadeCache(os.path.join(self.app_path, FRAME_DIR), self.hasher)
+        return self.crossfade_cache
+    
+    def get_crossfade_steps(self):
+        """Get the number of intermediate crossfade frames, or 0 if crossfading is off"""
+        return frame_count(self.settings.get("crossfade_seconds", 0))
+    
+    def get_monitors(self):
+        """Get the monitor rectangles in the order per-monitor images are assigned, or [] if unknown"""
+        try:
+            return sort_monitors(self.get_wallpaper_backend().get_monitors())
+        except Exception as e:
+            logging.error(f"Error getting monitor layout: {e}")
+            return []
+    
+    def get_rendered_wallpaper(self, image_path):
+        """Get a copy of the image pre-rendered for the display, or the original on failure"""
+        try:
+            display_size = self.get_wallpaper_backend().get_display_size()
+            if not display_size:
+                return image_path
+            
+            fit_mode = self.settings.get("fit_mode", DEFAULT_FIT_MODE)
+            return self.get_render_cache().get(image_path, display_size, fit_mode)
+        except Exception as e:
+            logging.error(f"Error rendering {image_path}, using original file: {e}")
+            return image_path
+    
+    def get_image_identity(self, image_path):
+        """Get the content hash of an image; only files whose size or modification time changed are re-read"""
+        try:
+            return self.hasher.hash_file(image_path)
+        except OSError as e:
+            logging.warning(f"Could not hash {image_path}: {e}")
+            return None
+    
     def set_wallpaper(self, image_path):
-        """Set Windows wallpaper to the specified image"""
-        if self.current_bg == image_path:
+        """Set the desktop wallpaper to the specified image unless the same content is already shown"""
+        identity = self.get_image_identity(image_path)
+        if identity is None:
+            if self.current_bg == image_path:
+                return
+        elif identity == self.current_bg_identity:
+            # Same content, possibly under another name; nothing to re-apply
+            self.current_bg = image_path
             return
             
+        start = time.perf_counter()
         try:
-            abs_path = os.path.abspath(image_path)
-            ctypes.windll.user32.SystemParametersInfoW(20, 0, abs_path, 3)
+            if self.current_bg is not None:
+                if image_path == self.prefetched_image:
+                    logging.info(f"Prefetch hit: {image_path}")
+                    self.metrics.increment("prefetch_hits_total")
+                else:
+                    logging.info(f"Prefetch miss: {image_path}")
+                    self.metrics.increment("prefetch_misses_total")
+            
+            abs_path = os.path.abspath(self.get_rendered_wallpaper(image_path))
+            self.apply_wallpaper_file(abs_path)
             self.current_bg = image_path
+            self.current_bg_identity = identity
             logging.info(f"Wallpaper set to: {image_path}")
+            self.metrics.increment("wallpaper_changes_total")
             return True
         except Exception as e:
             logging.error(f"Error setting wallpaper: {e}")
+            self.metrics.increment("wallpaper_errors_total")
+            return False
+        finally:
+            self.metrics.observe("set_wallpaper_seconds", time.perf_counter() - start, kind="single")
+    
+    def set_composite_wallpaper(self, image_paths, monitors):
+        """Span one image per monitor across the desktop unless the same composite is already shown"""
+        fit_mode = self.settings.get("fit_mode", DEFAULT_FIT_MODE)
+        try:
+            composite_cache = self.get_composite_cache()
+            # The key covers the layout, so a re-plug shows up as a different identity
+            identity = composite_cache.composite_key(image_paths, monitors, fit_mode)
+            if identity == self.current_bg_identity:
+                self.current_bg = list(image_paths)
+                return
+            
+            start = time.perf_counter()
+            abs_path = os.path.abspath(composite_cache.get(image_paths, monitors, fit_mode))
+            self.apply_wallpaper_file(abs_path, span=True)
+            self.metrics.observe("set_wallpaper_seconds", time.perf_counter() - start, kind="composite")
+            self.current_bg = list(image_paths)
+            self.current_bg_identity = identity
+            logging.info(f"Wallpaper set to composite for {len(monitors)} monitors: {image_paths}")
+            self.metrics.increment("wallpaper_changes_total")
+            return True
+        except Exception as e:
+            logging.error(f"Error setting composite wallpaper: {e}")
+            self.metrics.increment("wallpaper_errors_total")
             return False
     
+    def apply_wallpaper_file(self, abs_path, span=False):
+        """Hand a wallpaper file to the backend, crossfading from the current one if its frames are ready"""
+        backend = self.get_wallpaper_backend()
+        steps = self.get_crossfade_steps()
+        if steps and self.current_bg_file and self.current_bg_file != abs_path:
+            # Frames are only ever blended ahead of time; a miss switches without a fade
+            crossfade_cache = self.get_crossfade_cache()
+            frames = crossfade_cache.cached_frames(self.current_bg_file, abs_path)
+            if frames:
+                try:
+                    self.play_crossfade(frames, span)
+                    backend.apply(abs_path, span=span)
+                    self.current_bg_file = abs_path
+                finally:
+                    crossfade_cache.discard()
+                return
+            logging.info(f"Crossfade frames not ready, switching without a fade: {abs_path}")
+        
+        backend.apply(abs_path, span=span)
+        self.current_bg_file = abs_path
+    
+    def play_crossfade(self, frames, span=False):
+        """Apply pre-blended frames evenly over the crossfade duration, dropping frames that fall behind"""
+        backend = self.get_wallpaper_backend()
+        interval = self.settings.get("crossfade_seconds", 0) / (len(frames) + 1)
+        start = self.clock.time()
+        shown = 0
+        for step, frame in enumerate(frames, 1):
+            due = start + step * interval
+            if self.clock.time() > due + interval:
+                # A slow apply left this frame behind; skip it rather than stretch the fade
+                continue
+            if self.clock.wait(self.stop_event, max(due - self.clock.time(), 0)):
+                return
+            # Only the final image is saved as the user's wallpaper setting
+            backend.apply(frame, span=span, persist=False)
+            shown += 1
+        # Hold the last frame for one interval before the final image
+        self.clock.wait(self.stop_event, max(start + (len(frames) + 1) * interval - self.clock.time(), 0))
+        logging.info(f"Crossfade showed {shown} of {len(frames)} frames in {self.clock.time() - start:.2f}s")
+    
+    def prefetch_crossfade(self, abs_path):
+        """Blend the crossfade frames from the current wallpaper into an upcoming one"""
+        steps = self.get_crossfade_steps()
+        from_path = self.current_bg_file
+        if not steps or not from_path or from_path == abs_path:
+            return
+        try:
+            start = time.perf_counter()
+            if self.get_crossfade_cache().get(from_path, abs_path, steps):
+                logging.info(f"Prepared {steps} crossfade frames in {time.perf_counter() - start:.3f}s")
+        except Exception as e:
+            logging.error(f"Error preparing crossfade to {abs_path}: {e}")
+    
+    def compile_schedule(self):
+        """Rebuild the schedule lookup index from the current time ranges"""
+        self.calendar = CalendarRules(self.schedules, self.time_ranges) if self.schedules else None
+        self.schedule_uses_solar = uses_solar_time_points(self.all_time_ranges())
+        self.schedule_is_dated = self.schedule_uses_solar or self.calendar is not None
+        self.dated_schedules = {}
+        today = self.clock.now().date()
+        self.schedule = self.compile_schedule_for(today)
+        if self.schedule_is_dated:
+            self.dated_schedules[self.schedule_key(today)] = self.schedule
+        logging.info(f"Compiled schedule index with {self.schedule.range_count} time ranges")
+    
+    def all_time_ranges(self):
+        """Get the base time ranges and those of every calendar rule"""
+        return self.calendar.all_time_ranges() if self.calendar else self.time_ranges
+    
+    def get_solar_times(self, date):
+        """Get the local minute of each solar event on a date at the configured location, or None"""
+        location = configured_location(self.settings)
+        if location is None:
+            logging.warning("Solar time points need 'latitude' and 'longitude' in the settings")
+            return None
+        from solar import solar_times
+        return solar_times(*location, date)
+    
+    def compile_schedule_for(self, date):
+        """Compile the time ranges and calendar rules active on one date into an index"""
+        solar_times_for = self.get_solar_times if self.schedule_uses_solar else None
+        return compile_dated_index(date, self.time_ranges, self.calendar, solar_times_for)
+    
+    def schedule_key(self, date):
+        """Get what the compiled index of a date depends on: its calendar rules and, with solar time points, the date"""
+        combination = self.calendar.combination_for(date) if self.calendar else None
+        return combination, date if self.schedule_uses_solar else None
+    
+    def schedule_for(self, date):
+        """Get the schedule index for a date; dated schedules compile at most once per day from memoized yearly tables"""
+        if not self.schedule_is_dated:
+            return self.schedule
+        key = self.schedule_key(date)
+        index = self.dated_schedules.get(key)
+        if index is None:
+            if len(self.dated_schedules) >= DATED_SCHEDULE_CACHE:
+                self.dated_schedules = {}
+            index = self.dated_schedules[key] = self.compile_schedule_for(date)
+            logging.info(f"Compiled schedule index for {date} with {index.range_count} time ranges")
+        return index
+    
+    def range_at(self, moment):
+        """Get the time range active at a datetime"""
+        if not self.schedule_is_dated:
+            return self.schedule.range_at(moment)
+        return self.schedule_for(moment.date()).range_at(moment)
+    
     def get_current_time_range(self):
         """Get the appropriate time range for the current time"""
-        now = datetime.datetime.now().time()
+        return self.range_at(self.clock.now())
+    
+    def next_transition(self, now=None):
+        """Get the datetime of the next scheduled background change, or None if there is none"""
+        if now is None:
+            now = self.clock.now()
         
-        for time_range in self.time_ranges:
-            start_str = time_range["start"]
-            end_str = time_range["end"]
-            
-            # Parse time strings into datetime.time objects
-            start_hour, start_minute = map(int, start_str.split(':'))
-            end_hour, end_minute = map(int, end_str.split(':'))
-            
-            start_time = datetime.time(start_hour, start_minute)
-            end_time = datetime.time(end_hour, end_minute)
-            
-            # Check if current time is within range
-            if start_time <= end_time:  # Normal case: start < end
-                if start_time <= now <= end_time:
-                    return time_range
-            else:  # Overnight case: start > end (e.g., 23:00-8:30)
-                if now >= start_time or now <= end_time:
-                    return time_range
+        midnight = now.replace(hour=0, minute=0, second=0, microsecond=0, fold=0)
+        minute = now.hour * 60 + now.minute
+        now_timestamp = now.timestamp()
+        schedule = self.schedule_for(now.date())
+        days_ahead = 0
         
+        # A boundary can already be behind us in local time around DST changes
+        attempts = len(schedule.boundaries) + 1
+        while attempts > 0:
+            boundary = schedule.next_boundary(minute)
+            if self.schedule_is_dated and (boundary is None or boundary >= MINUTES_PER_DAY):
+                # Tomorrow has its own index; its rules or solar times can differ from today's
+                if days_ahead >= TRANSITION_SEARCH_DAYS:
+                    return None
+                days_ahead += 1
+                last_range = schedule.lookup(MINUTES_PER_DAY - 1)
+                midnight += datetime.timedelta(days=1)
+                schedule = self.schedule_for(midnight.date())
+                minute = 0
+                attempts = len(schedule.boundaries) + 1
+                if schedule.lookup(0) != last_range:
+                    # Different calendar rules take over at midnight
+                    timestamp = transition_timestamp(midnight, now_timestamp)
+                    if timestamp is not None:
+                        return datetime.datetime.fromtimestamp(timestamp)
+                continue
+            if boundary is None:
+                return None
+            
+            timestamp = transition_timestamp(midnight + datetime.timedelta(minutes=boundary), now_timestamp)
+            if timestamp is not None:
+                return datetime.datetime.fromtimestamp(timestamp)
+            minute = boundary
+            attempts -= 1
         return None
     
+    def get_monitor_timeout(self):
+        """Get the number of seconds the monitor can sleep before its next check"""
+        now = self.clock.now()
+        timeout = CHECK_INTERVAL if self.poll_config else self.max_monitor_sleep
+        
+        next_change = self.next_transition(now)
+        if next_change is None and self.schedule_is_dated:
+            # A change beyond the days next_transition searches is found by looking again later
+            timeout = min(timeout, TRANSITION_SEARCH_DAYS * 24 * 60 * 60)
+        elif next_change is not None:
+            # Compare POSIX timestamps so DST changes are accounted for
+            until_change = next_change.timestamp() - now.timestamp()
+            lead = self.get_prefetch_lead()
+            if self.prefetch_enabled and next_change != self.prefetched_transition and until_change > lead:
+                # Wake up early enough to prefetch the next wallpaper
+                until_change -= lead
+            timeout = min(timeout, until_change)
+        
+        return max(timeout, 0)
+    
+    def get_prefetch_lead(self):
+        """Get how many seconds before a transition the next wallpaper is prefetched"""
+        return max(self.settings.get("prefetch_lead_seconds", PREFETCH_LEAD), 0)
+    
+    def prefetch_next_background(self):
+        """Warm up the next wallpaper in the background if its transition is close"""
+        if not self.prefetch_enabled:
+            return
+        
+        now = self.clock.now()
+        next_change = self.next_transition(now)
+        if next_change is None or next_change == self.prefetched_transition:
+            return
+        if next_change.timestamp() - now.timestamp() > self.get_prefetch_lead():
+            return
+        
+        self.prefetched_transition = next_change
+        time_range = self.range_at(next_change)
+        if time_range and time_range.get("images"):
+            monitors = self.get_monitors()
+            if len(monitors) > 1:
+                image_paths = monitor_images(time_range, len(monitors))
+                threading.Thread(target=self.prefetch_composite, args=(image_paths, monitors), daemon=True).start()
+                return
+        if time_range and time_range.get("image"):
+            threading.Thread(target=self.prefetch_image, args=(time_range["image"],), daemon=True).start()
+    
+    def prefetch_image(self, image_path):
+        """Read, validate and pre-render an image so switching to it is a cheap handoff"""
+        try:
+            start = time.perf_counter()
+            
+            # Read the file once to pull it into the OS page cache
+            with open(image_path, 'rb') as f:
+                while f.read(1024 * 1024):
+                    pass
+            
+            # Make sure the image is decodable before its time slot arrives
+            from PIL import Image
+            with Image.open(image_path) as image:
+                image.verify()
+            
+            # Reading the rendered copy also warms it up for the OS
+            rendered_path = self.get_rendered_wallpaper(image_path)
+            with open(rendered_path, 'rb') as f:
+                while f.read(1024 * 1024):
+                    pass
+            self.prefetch_crossfade(os.path.abspath(rendered_path))
+            
+            self.prefetched_image = image_path
+            logging.info(f"Prefetched {image_path} in {time.perf_counter() - start:.3f}s")
+        except Exception as e:
+            logging.error(f"Error prefetching {image_path}: {e}")
+    
+    def prefetch_composite(self, image_paths, monitors):
+        """Compose the next spanning wallpaper ahead of its transition"""
+        try:
+            start = time.perf_counter()
+            fit_mode = self.settings.get("fit_mode", DEFAULT_FIT_MODE)
+            composite_path = self.get_composite_cache().get(image_paths, monitors, fit_mode)
+            self.prefetch_crossfade(os.path.abspath(composite_path))
+            self.prefetched_image = list(image_paths)
+            logging.info(f"Prefetched composite for {len(monitors)} monitors in {time.perf_counter() - start:.3f}s")
+        except Exception as e:
+            logging.error(f"Error prefetching composite of {image_paths}: {e}")
+    
     def update_background(self):
         """Update background based on current time"""
+        if self.paused.is_set():
+            return
         time_range = self.get_current_time_range()
-        if time_range and os.path.exists(time_range["image"]):
-            self.set_wallpaper(time_range["image"])
+        if not time_range:
+            return
+        
+        # The monitor layout is only needed for ranges with per-monitor images
+        monitors = self.get_monitors() if time_range.get("images") else ()
+        image_paths = monitor_images(time_range, max(len(monitors), 1))
+        if not any(image_paths):
+            return
+        
+        missing = [image_path for image_path in image_paths if image_path and not os.path.exists(image_path)]
+        if missing:
+            for image_path in missing:
+                if image_path not in self.missing_images:
+                    self.missing_images.add(image_path)
+                    logging.error(f"Image for {time_range['start']}-{time_range['end']} not found, keeping the current wallpaper: {image_path}")
+            return
+        
+        if len(monitors) > 1:
+            self.set_composite_wallpaper(image_paths, monitors)
+        else:
+            self.set_wallpaper(image_paths[0])
+    
+    def sort_time_points(self, time_points):
+        """Sort time points by today's time of day; solar ones resolve at the configured location"""
+        solar_times = None
+        if any(is_solar_time_point(time_point) for time_point in time_points):
+            solar_times = self.get_solar_times(self.clock.now().date())
+        
+        def minute_of_day(time_point):
+            try:
+                return parse_time_point(time_point, solar_times)
+            except (ValueError, AttributeError):
+                return 0
+        
+        return sorted(time_points, key=minute_of_day)
     
     def get_time_period_name(self, start, end):
         """Get a descriptive name for the time period"""
@@ -218,6 +786,10 @@ class TimeBasedBackground:
     
     def setup_time_points(self):
         """Setup time points before configuring time ranges"""
+        import tkinter as tk
+        from tkinter import messagebox
+        from virtual_list import VirtualRowList
+        
         try:
             # Check if we have existing time points configuration
             saved_time_points = self.load_time_points_config()
@@ -297,48 +869,18 @@ class TimeBasedBackground:
             content_frame.grid_columnconfigure(0, weight=1)
             content_frame.grid_rowconfigure(0, weight=1)
             
-            # Create a canvas for scrolling in the content frame
-            canvas = tk.Canvas(content_frame, bg="#f0f0f0", highlightthickness=0)
-            scrollbar = tk.Scrollbar(content_frame, orient="vertical", command=canvas.yview)
-            
-            # Configure the canvas
-            canvas.configure(yscrollcommand=scrollbar.set)
-            
-            # Pack the scrollbar and canvas
-            scrollbar.grid(row=0, column=1, sticky="ns")
-            canvas.grid(row=0, column=0, sticky="nsew")
-            
-            # Create a frame inside the canvas for entries
-            entries_frame = tk.Frame(canvas, bg="#f0f0f0")
-            canvas_window = canvas.create_window((0, 0), window=entries_frame, anchor="nw")
-            
-            # Configure the scrolling
-            def on_frame_configure(event):
-                canvas.configure(scrollregion=canvas.bbox("all"))
-                
-            # Configure the canvas window to stretch horizontally
-            def on_canvas_configure(event):
-                canvas.itemconfig(canvas_window, width=event.width)
-                
-            # Bind events for scrolling
-            entries_frame.bind("<Configure>", on_frame_configure)
-            canvas.bind("<Configure>", on_canvas_configure)
-            
-            # Enable mousewheel scrolling
-            def on_mousewheel(event):
-                canvas.yview_scroll(int(-1 * (event.delta / 120)), "units")
-            
-            canvas.bind_all("<MouseWheel>", on_mousewheel)
-            
-            # Store time points entries and validation variable
-            time_entries = []
-            time_stringvars = []
+            # Indexes of time points that failed validation
+            invalid_entries = set()
             
             # Validation function for time entry (HH:MM format)
             def validate_time(value, stvar, entry):
                 if value == "":
                     return True
                 
+                # Solar time points like "sunset-30" are checked when saving
+                if value[0].isalpha():
+                    return len(value) <= 32 and all(c.isalnum() or c in "_+- " for c in value)
+                
                 # Check for proper format (HH:MM)
                 if len(value) > 5:
                     return False
@@ -369,7 +911,7 @@ class TimeBasedBackground:
             # Format time entry correctly when focus is lost
             def format_time(event, stringvar):
                 value = stringvar.get().strip()
-                if not value:
+                if not value or value[0].isalpha():
                     return
                 
                 parts = value.split(':')
@@ -398,61 +940,75 @@ class TimeBasedBackground:
                 # Set the formatted time back to the entry
                 stringvar.set(f"{hours:02d}:{minutes:02d}")
             
-            # Function to update UI with current time points
-            def update_time_points_ui():
-                # Clear existing entries
-                for widget in entries_frame.winfo_children():
-                    widget.destroy()
+            # Build one recycled row; it shows whichever time point it is bound to
+            def create_time_point_row(parent):
+                row = {}
+                row["frame"] = row_frame = tk.Frame(parent, pady=8, padx=5)
                 
-                time_entries.clear()
-                time_stringvars.clear()
+                # Edits go straight to the time point the row currently shows
+                time_var = tk.StringVar()
+                row["var"] = time_var
                 
-                # Add time point entries
-                for i, time_point in enumerate(time_points):
-                    # Alternate background colors for rows
-                    bg_color = ROW_BG_1 if i % 2 == 0 else ROW_BG_2
-                    
-                    row_frame = tk.Frame(entries_frame, bg=bg_color, pady=8, padx=5)
-                    row_frame.pack(fill=tk.X, pady=2)
-                    
-                    # Time entry
-                    time_var = tk.StringVar(value=time_point)
-                    time_stringvars.append(time_var)
-                    
-                    # Validate command
-                    validate_cmd = (root.register(
-                        lambda val, sv=time_var, en=None: validate_time(val, sv, en)
-                    ), '%P')
-                    
-                    time_entry = tk.Entry(
-                        row_frame, 
-                        textvariable=time_var, 
-                        width=20,
-                        font=("Arial", 10),
-                        validate="key", 
-                        validatecommand=validate_cmd
-                    )
-                    time_entry.bind("<FocusOut>", lambda event, sv=time_var: format_time(event, sv))
-                    time_entry.pack(side=tk.LEFT, padx=5)
-                    time_entries.append(time_entry)
-                    
-                    # Delete button
-                    delete_button = tk.Button(
-                        row_frame,
-                        text="🗑️",
-                        command=lambda idx=i: delete_time_point(idx),
-                        bg=DELETE_BUTTON_BG,
-                        activebackground=DELETE_BUTTON_ACTIVE_BG,
-                        fg=BUTTON_FG,
-                        font=("Arial", 10, "bold"),
-                        width=3,
-                        relief=tk.RAISED,
-                        bd=2
-                    )
-                    delete_button.pack(side=tk.LEFT, padx=10)
+                def on_edit(*args):
+                    index = row["index"]
+                    if index is not None and time_points[index] != time_var.get():
+                        time_points[index] = time_var.get()
+                        invalid_entries.discard(index)
+                        time_entry.config(background="white")
+                
+                time_var.trace_add("write", on_edit)
+                
+                # Validate command
+                validate_cmd = (root.register(
+                    lambda val: validate_time(val, time_var, None)
+                ), '%P')
+                
+                time_entry = tk.Entry(
+                    row_frame, 
+                    textvariable=time_var, 
+                    width=20,
+                    font=("Arial", 10),
+                    validate="key", 
+                    validatecommand=validate_cmd
+                )
+                time_entry.bind("<FocusOut>", lambda event: format_time(event, time_var))
+                time_entry.pack(side=tk.LEFT, padx=5)
+                row["entry"] = time_entry
+                
+                # Delete button
+                delete_button = tk.Button(
+                    row_frame,
+                    text="🗑️",
+                    command=lambda: delete_time_point(row["index"]),
+                    bg=DELETE_BUTTON_BG,
+                    activebackground=DELETE_BUTTON_ACTIVE_BG,
+                    fg=BUTTON_FG,
+                    font=("Arial", 10, "bold"),
+                    width=3,
+                    relief=tk.RAISED,
+                    bd=2
+                )
+                delete_button.pack(side=tk.LEFT, padx=10)
+                return row
+            
+            # Show a time point in a recycled row
+            def bind_time_point_row(row, index):
+                # Alternate background colors for rows
+                row["frame"].config(bg=ROW_BG_1 if index % 2 == 0 else ROW_BG_2)
+                row["var"].set(time_points[index])
+                row["entry"].config(background="#ffcccc" if index in invalid_entries else "white")
+            
+            # Only the rows on screen have widgets, so long lists stay fast
+            time_point_list = VirtualRowList(
+                content_frame, create_time_point_row, bind_time_point_row,
+                row_count=len(time_points)
+            )
+            time_point_list.frame.grid(row=0, column=0, sticky="nsew")
             
             # Function to delete a time point
             def delete_time_point(index):
+                if index is None:
+                    return
                 if len(time_points) <= 2:
                     messagebox.showwarning(
                         "Cannot Delete", 
@@ -461,43 +1017,29 @@ class TimeBasedBackground:
                     return
                 
                 del time_points[index]
-                update_time_points_ui()
-                
-                # Update canvas scrollregion
-                root.update_idletasks()
-                canvas.configure(scrollregion=canvas.bbox("all"))
+                invalid_entries.clear()
+                time_point_list.set_count(len(time_points))
             
             # Function to add a new time point
             def add_time_point():
                 # Add a default new time point
                 time_points.append("12:00")
-                update_time_points_ui()
+                time_point_list.set_count(len(time_points))
                 
-                # Focus on the new entry for immediate editing
-                if time_entries:
-                    time_entries[-1].focus_set()
-                    time_entries[-1].select_range(0, 'end')
-                
-                # Update canvas scrollregion
-                root.update_idletasks()
-                canvas.configure(scrollregion=canvas.bbox("all"))
-                
-                # Scroll to the bottom
-                canvas.yview_moveto(1.0)
+                # Scroll to the new entry and focus it for immediate editing
+                time_point_list.scroll_to(len(time_points) - 1)
+                row = time_point_list.row_for(len(time_points) - 1)
+                if row:
+                    row["entry"].focus_set()
+                    row["entry"].select_range(0, 'end')
             
             # Function to sort time points
             def sort_time_points():
-                # Get current values from entries and validate
-                for i, string_var in enumerate(time_stringvars):
-                    time_points[i] = string_var.get()
-                
                 # Sort time points
                 try:
-                    time_points.sort(key=lambda x: 
-                        int(x.split(':')[0]) * 60 + int(x.split(':')[1]) 
-                        if ':' in x and len(x.split(':')) == 2 else 0
-                    )
-                    update_time_points_ui()
+                    time_points[:] = self.sort_time_points(time_points)
+                    invalid_entries.clear()
+                    time_point_list.refresh()
                 except Exception as e:
                     messagebox.showerror("Error", f"Error sorting time points: {e}")
             
@@ -505,20 +1047,28 @@ class TimeBasedBackground:
             def validate_and_save():
                 # Get time points from entries
                 updated_time_points = []
-                invalid_entries = []
+                invalid_entries.clear()
                 
-                for i, string_var in enumerate(time_stringvars):
-                    time_value = string_var.get().strip()
+                for i, time_point in enumerate(time_points):
+                    time_value = time_point.strip()
                     
                     # Basic validation
                     if not time_value:
-                        invalid_entries.append(i)
+                        invalid_entries.add(i)
+                        continue
+                    
+                    # Solar time points are kept as written
+                    if time_value[0].isalpha():
+                        if is_solar_time_point(time_value):
+                            updated_time_points.append(time_value)
+                        else:
+                            invalid_entries.add(i)
                         continue
                     
                     # Format check for HH:MM
                     parts = time_value.split(':')
                     if len(parts) != 2 or not parts[0].isdigit() or not parts[1].isdigit():
-                        invalid_entries.append(i)
+                        invalid_entries.add(i)
                         continue
                     
                     # Range check
@@ -527,23 +1077,23 @@ class TimeBasedBackground:
                         minutes = int(parts[1])
                         
                         if hours < 0 or hours > 23 or minutes < 0 or minutes > 59:
-                            invalid_entries.append(i)
+                            invalid_entries.add(i)
                             continue
                         
                         # Format to ensure consistency
                         formatted_time = f"{hours:02d}:{minutes:02d}"
                         updated_time_points.append(formatted_time)
                     except ValueError:
-                        invalid_entries.append(i)
+                        invalid_entries.add(i)
                 
-                # Highlight invalid entries
+                # Highlight invalid entries with a light red background
                 if invalid_entries:
-                    for idx in invalid_entries:
-                        time_entries[idx].config(background="#ffcccc")  # Light red background
+                    time_point_list.scroll_to(min(invalid_entries))
                     
                     messagebox.showerror(
                         "Invalid Time Format", 
-                        "Some time points have invalid format. Please use HH:MM format (00:00 to 23:59)."
+                        "Some time points have invalid format. Please use HH:MM format (00:00 to 23:59) "
+                        "or a solar event such as sunrise, sunset+30 or civil_dusk-15."
                     )
                     return None
                 
@@ -565,17 +1115,11 @@ class TimeBasedBackground:
                 
                 # Sort the time points before returning
                 try:
-                    updated_time_points.sort(key=lambda x: 
-                        int(x.split(':')[0]) * 60 + int(x.split(':')[1])
-                    )
-                    return updated_time_points
+                    return self.sort_time_points(updated_time_points)
                 except Exception as e:
                     messagebox.showerror("Error", f"Error sorting time points: {e}")
                     return None
             
-            # Initialize the UI with time points
-            update_time_points_ui()
-            
             # Action buttons panel at row 3 (below the scrolling area)
             action_panel = tk.Frame(root, bg="#f0f0f0", padx=20, pady=10)
             action_panel.grid(row=3, column=0, sticky="ew")
@@ -690,10 +1234,6 @@ class TimeBasedBackground:
             root.update()
             root.attributes('-topmost', False)
             
-            # Configure the scroll region for proper scrolling
-            root.update_idletasks()
-            canvas.configure(scrollregion=canvas.bbox("all"))
-            
             root.mainloop()
             
             # Return the user-defined time points
@@ -707,6 +1247,12 @@ class TimeBasedBackground:
     
     def setup_time_ranges(self):
         """Setup time ranges from user input"""
+        import tkinter as tk
+        from tkinter import filedialog
+        from tkinter import messagebox
+        from virtual_list import VirtualRowList
+        from thumbnails import ThumbnailLoader, THUMBNAIL_CACHE_DIR
+        
         try:
             # Get time points from the time points setup page
             # Pass existing time points to setup_time_points if available
@@ -786,58 +1332,17 @@ class TimeBasedBackground:
             tk.Label(header_frame, text="Time Range", width=20, 
                     font=("Arial", 11, "bold"), bg=HEADER_BG, fg=HEADER_FG).pack(side=tk.LEFT)
             
-            tk.Label(header_frame, text="Image Path", width=40, 
+            tk.Label(header_frame, text="Preview", width=8, 
+                    font=("Arial", 11, "bold"), bg=HEADER_BG, fg=HEADER_FG).pack(side=tk.LEFT)
+            
+            tk.Label(header_frame, text="Image Path", width=32, 
                     font=("Arial", 11, "bold"), bg=HEADER_BG, fg=HEADER_FG).pack(side=tk.LEFT, padx=5)
             
             tk.Label(header_frame, text="Action", width=12, 
                     font=("Arial", 11, "bold"), bg=HEADER_BG, fg=HEADER_FG).pack(side=tk.LEFT)
             
-            # Create a frame to hold the canvas and scrollbar
-            scroll_frame = tk.Frame(main_frame, bg="#f0f0f0")
-            scroll_frame.pack(fill=tk.BOTH, expand=True, pady=(0, 10))
-            
-            # Create a canvas for scrolling
-            canvas = tk.Canvas(scroll_frame, bg="#f0f0f0", highlightthickness=0)
-            scrollbar = tk.Scrollbar(scroll_frame, orient="vertical", command=canvas.yview)
-            
-            # Configure the canvas
-            canvas.configure(yscrollcommand=scrollbar.set)
-            
-            # Pack the scrollbar and canvas
-            scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
-            canvas.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
-            
-            # Create a frame inside the canvas for entries
-            entries_frame = tk.Frame(canvas, bg="#f0f0f0")
-            
-            # Add the entries frame to the canvas
-            canvas_window = canvas.create_window((0, 0), window=entries_frame, anchor="nw")
-            
-            # Configure the scrolling
-            def on_frame_configure(event):
-                canvas.configure(scrollregion=canvas.bbox("all"))
-            
-            # Configure the canvas window to stretch horizontally
-            def on_canvas_configure(event):
-                canvas.itemconfig(canvas_window, width=event.width)
-            
-            # Bind events for scrolling
-            entries_frame.bind("<Configure>", on_frame_configure)
-            canvas.bind("<Configure>", on_canvas_configure)
-            
-            # Enable mousewheel scrolling
-            def on_mousewheel(event):
-                canvas.yview_scroll(int(-1 * (event.delta / 120)), "units")
-            
-            canvas.bind_all("<MouseWheel>", on_mousewheel)
-            
-            # Bind additional events for better scrolling
-            canvas.bind("<Enter>", lambda e: canvas.bind_all("<MouseWheel>", on_mousewheel))
-            canvas.bind("<Leave>", lambda e: canvas.unbind_all("<MouseWheel>"))
-            
-            # Store path variables
-            path_vars = {}
-            buttons = {}
+            # Selected image for each time range
+            images = [""] * len(ranges)
             
             # Function to browse for an image
             def browse_image(index):
@@ -847,50 +1352,42 @@ class TimeBasedBackground:
                         filetypes=(("Image files", "*.jpg;*.jpeg;*.png;*.bmp"), ("All files", "*.*"))
                     )
                     if filename:
-                        path_vars[index].set(filename)
-                        # Update button text
-                        if not buttons[index]["text"] == "Change":
-                            buttons[index].config(text="Change")
+                        images[index] = filename
+                        # Only the row showing this range needs updating
+                        range_list.refresh(index)
                 except Exception as e:
                     logging.error(f"Error browsing for image: {e}")
                     messagebox.showerror("Error", f"Failed to select image: {e}")
             
-            # Add time range entries
-            for i, (start, end) in enumerate(ranges):
-                # Alternate background colors for rows
-                bg_color = ROW_BG_1 if i % 2 == 0 else ROW_BG_2
-                
-                row_frame = tk.Frame(entries_frame, bg=bg_color, pady=8, padx=5)
-                row_frame.pack(fill=tk.X, pady=2)
+            # Build one recycled row; it shows whichever time range it is bound to
+            def create_range_row(parent):
+                row = {}
+                row["frame"] = row_frame = tk.Frame(parent, pady=8, padx=5)
                 
                 # Time range label
-                time_label = tk.Label(
-                    row_frame, 
-                    text=f"{start} to {end}", 
-                    width=20,
-                    font=("Arial", 10),
-                    bg=bg_color
-                )
-                time_label.pack(side=tk.LEFT)
+                row["label"] = tk.Label(row_frame, width=20, font=("Arial", 10))
+                row["label"].pack(side=tk.LEFT)
                 
-                # Path variable and entry
-                path_var = tk.StringVar()
-                path_vars[i] = path_var
+                # Thumbnail preview; a placeholder until the image is decoded
+                row["thumbnail"] = tk.Label(row_frame, image=thumbnail_loader.placeholder)
+                row["thumbnail"].pack(side=tk.LEFT, padx=5)
                 
+                # Path variable and entry
+                row["path"] = tk.StringVar()
                 path_entry = tk.Entry(
                     row_frame, 
-                    textvariable=path_var, 
-                    width=40, 
+                    textvariable=row["path"], 
+                    width=32, 
                     readonlybackground="white"
                 )
                 path_entry.configure(state="readonly")
                 path_entry.pack(side=tk.LEFT, padx=5)
                 
                 # Browse button
-                browse_button = tk.Button(
+                row["button"] = tk.Button(
                     row_frame,
                     text="Choose",
-                    command=lambda idx=i: browse_image(idx),
+                    command=lambda: browse_image(row["index"]),
                     width=10,
                     bg=BUTTON_BG,
                     activebackground=BUTTON_ACTIVE_BG,
@@ -899,8 +1396,34 @@ class TimeBasedBackground:
                     relief=tk.RAISED,
                     bd=2
                 )
-                buttons[i] = browse_button
-                browse_button.pack(side=tk.LEFT)
+                row["button"].pack(side=tk.LEFT)
+                return row
+            
+            # Show a time range in a recycled row
+            def bind_range_row(row, index):
+                # Alternate background colors for rows
+                bg_color = ROW_BG_1 if index % 2 == 0 else ROW_BG_2
+                start, end = ranges[index]
+                row["frame"].config(bg=bg_color)
+                row["label"].config(text=f"{start} to {end}", bg=bg_color)
+                row["path"].set(images[index])
+                row["thumbnail"].config(image=thumbnail_loader.get(images[index]))
+                row["button"].config(text="Change" if images[index] else "Choose")
+            
+            # Refresh the rows showing an image once its thumbnail is ready
+            def on_thumbnail_ready(image_path):
+                for row in range_list.rows:
+                    if row["index"] is not None and images[row["index"]] == image_path:
+                        range_list.refresh(row["index"])
+            
+            # Thumbnails are decoded off the Tk thread and cached on disk
+            thumbnail_loader = ThumbnailLoader(
+                root, os.path.join(self.app_path, THUMBNAIL_CACHE_DIR), on_thumbnail_ready
+            )
+            
+            # Only the rows on screen have widgets, so long schedules open quickly
+            range_list = VirtualRowList(main_frame, create_range_row, bind_range_row, row_count=len(ranges))
+            range_list.frame.pack(fill=tk.BOTH, expand=True, pady=(0, 10))
             
             # Button frame
             button_frame = tk.Frame(main_frame, bg="#f0f0f0", pady=15)
@@ -909,11 +1432,7 @@ class TimeBasedBackground:
             def save_config():
                 try:
                     # Check if at least one image is selected
-                    has_image = False
-                    for i in range(len(ranges)):
-                        if path_vars[i].get().strip():
-                            has_image = True
-                            break
+                    has_image = any(image.strip() for image in images)
                     
                     if not has_image:
                         messagebox.showwarning(
@@ -922,17 +1441,23 @@ class TimeBasedBackground:
                         )
                         return
                     
-                    # Save configuration
-                    self.time_ranges = []
-                    for i, (start, end) in enumerate(ranges):
-                        image_path = path_vars[i].get()
+                    time_ranges = []
+                    for (start, end), image_path in zip(ranges, images):
                         if image_path:
-                            self.time_ranges.append({
+                            time_ranges.append({
                                 "start": start,
                                 "end": end,
                                 "image": image_path
                             })
                     
+                    # Check every image now rather than when its time slot arrives
+                    checks, report = self.check_images(time_ranges)
+                    if any(not check.ok for check in checks):
+                        if not messagebox.askyesno("Image Problems", f"{report}\n\nSave anyway?"):
+                            return
+                    
+                    # Save configuration
+                    self.time_ranges = time_ranges
                     if self.save_config():
                         root.quit()
                         root.destroy()
@@ -981,10 +1506,6 @@ class TimeBasedBackground:
             root.update()
             root.attributes('-topmost', False)
             
-            # Configure the scroll region for proper scrolling
-            root.update_idletasks()
-            canvas.configure(scrollregion=canvas.bbox("all"))
-            
             root.mainloop()
             
         except Exception as e:
@@ -992,96 +1513,362 @@ class TimeBasedBackground:
             traceback.print_exc()
             messagebox.showerror("Error", f"An error occurred: {e}")
     
+    def on_config_changed(self):
+        """Called by the config watcher after a burst of changes to the config files"""
+        self.config_changed.set()
+        self.wake_event.set()
+    
+    def start_config_watcher(self):
+        """Start watching both configuration files for changes"""
+        try:
+            self.config_watcher = ConfigWatcher(
+                [self.config_path, self.time_points_config_path],
+                self.on_config_changed,
+                poll_interval=CHECK_INTERVAL
+            )
+            self.config_watcher.start()
+            self.poll_config = False
+        except Exception as e:
+            logging.error(f"Error starting config watcher: {e}")
+            self.config_watcher = None
+    
     def check_config_updated(self):
         """Check if configuration file has been modified and reload if needed"""
-        if os.path.exists(self.config_path):
-            current_modified = os.path.getmtime(self.config_path)
-            if current_modified > self.last_config_modified:
-                logging.info("Configuration file has been modified, reloading...")
-                self.load_config()
-                # Force background update after config reload
-                self.update_background()
-                return True
-        return False
+        if not self.config_changed.is_set():
+            if self.config_watcher is not None:
+                return False
+            # No watcher running, fall back to comparing modification times
+            if not os.path.exists(self.config_path):
+                return False
+            if os.path.getmtime(self.config_path) <= self.last_config_modified:
+                return False
+        
+        self.config_changed.clear()
+        if not os.path.exists(self.config_path):
+            return False
+        
+        try:
+            self.last_config_modified = os.path.getmtime(self.config_path)
+            config, config_hash = read_config_file(self.config_path)
+        except Exception as e:
+            logging.error(f"Error reading configuration: {e}")
+            self.metrics.increment("config_read_errors_total")
+            return False
+        
+        # Only content the live configuration already matches, such as our own save, is skipped
+        generation = config.get(GENERATION_KEY)
+        if config_hash == self.config_hash:
+            logging.info("Configuration file content already loaded, skipping reload")
+            self.metrics.increment("config_reloads_skipped_total")
+            return False
+        
+        logging.info(f"Configuration file has been modified, reloading generation {generation}...")
+        self.metrics.increment("config_reloads_total")
+        self.config_hash = config_hash
+        old_settings = self.settings
+        old_images = [time_range.get("image") for time_range in self.time_ranges if isinstance(time_range, dict)]
+        self.apply_config(config)
+        new_images = [time_range.get("image") for time_range in self.time_ranges if isinstance(time_range, dict)]
+        changed_images = sum(1 for old, new in zip(old_images, new_images) if old != new)
+        logging.info(
+            f"Reloaded {len(self.time_ranges)} time ranges, "
+            f"{changed_images + abs(len(new_images) - len(old_images))} image(s) changed"
+        )
+        
+        if any(self.settings.get(key) != old_settings.get(key) for key in RENDER_SETTINGS):
+            # Display settings changed, so the current wallpaper has to be rendered again
+            self.render_cache = None
+            self.composite_cache = None
+            self.crossfade_cache = None
+            self.backend = None
+            self.current_bg = None
+            self.current_bg_identity = None
+        
+        # Only prefetch again if the upcoming image is not the one already warmed up
+        next_change = self.next_transition()
+        upcoming = self.range_at(next_change) if next_change else None
+        if upcoming is None or upcoming.get("image") != self.prefetched_image:
+            self.prefetched_transition = None
+            self.prefetched_image = None
+        
+        # Validate the new images and report missing ones again
+        self.missing_images.clear()
+        self.start_preflight()
+        
+        # Re-applies only if the wallpaper for now differs in content
+        self.update_background()
+        return True
+    
+    def monitor_iteration(self):
+        """Run one pass of the monitor loop and return how long to sleep afterwards"""
+        self.wake_event.clear()
+        self.metrics.increment("monitor_wakeups_total")
+        
+        # Check if config has been updated
+        self.check_config_updated()
+        
+        if self.force_apply.is_set():
+            self.force_apply.clear()
+            self.current_bg = None
+            self.current_bg_identity = None
+        
+        # Update background based on current time
+        start = time.perf_counter()
+        self.update_background()
+        self.metrics.observe("update_background_seconds", time.perf_counter() - start)
+        
+        # How long after its boundary the switch actually happened
+        if self.expected_transition is not None:
+            lateness = self.clock.time() - self.expected_transition.timestamp()
+            if lateness >= 0:
+                self.metrics.observe("switch_lateness_seconds", lateness, buckets=LATENESS_BUCKETS)
+                self.metrics.increment("transitions_total")
+        self.expected_transition = self.next_transition()
+        
+        # Warm up the next wallpaper shortly before it is needed
+        self.prefetch_next_background()
+        
+        return self.get_monitor_timeout()
     
     def background_monitor(self):
         """Monitor time and update background in a separate thread"""
         while not self.stop_event.is_set():
             try:
-                # Check if config has been updated
-                self.check_config_updated()
-                
-                # Update background based on current time
-                self.update_background()
-                
-                # Sleep in smaller increments to check for stop event more frequently
-                for _ in range(CHECK_INTERVAL):
-                    if self.stop_event.is_set():
-                        break
-                    time.sleep(1)
+                # Sleep until the next transition, a config check or an early wake-up
+                self.clock.wait(self.wake_event, self.monitor_iteration())
             except Exception as e:
                 logging.error(f"Error in background monitor: {e}")
-                time.sleep(5)  # Short sleep on error
+                self.clock.wait(self.stop_event, 5)  # Short sleep on error
     
-    def create_icon_image(self):
-        """Create an icon for the system tray"""
-        # Create a simple clock icon
-        width = 64
-        height = 64
-        color1 = (0, 114, 206)  # Blue
-        color2 = (255, 255, 255)  # White
-        
-        image = Image.new('RGB', (width, height), color2)
-        dc = ImageDraw.Draw(image)
+    def simulate(self, start, end):
+        """Replay the monitor loop between two datetimes on a virtual clock and print a report"""
+        self.clock = SimulatedClock(start, end, self.stop_event)
+        recorder = RecordingBackend(display_size=None, time_source=self.clock.time)
+        self.backend = TimedBackend(recorder, self.metrics)
+        # Prefetching only warms caches, which has no meaning in virtual time
+        self.prefetch_enabled = False
+        self.preflight_enabled = False
+        # The config is still checked on every wakeup, but wakeups need no polling cap
+        self.poll_config = False
+        # Virtual time has no clock drift or resume from sleep, so only transitions wake the loop
+        self.max_monitor_sleep = float('inf')
         
-        # Draw clock circle
-        dc.ellipse((4, 4, width-4, height-4), fill=color1)
-        dc.ellipse((8, 8, width-8, height-8), fill=color2)
+        if not self.load_config():
+            print("No configuration to simulate")
+            return False
         
-        # Draw clock hands
-        now = datetime.datetime.now()
+        cpu_start = time.process_time()
+        self.background_monitor()
+        cpu_seconds = time.process_time() - cpu_start
         
-        # Hour hand
-        hour_angle = (now.hour % 12 + now.minute / 60) * 30
-        hour_x = width/2 + 15 * -1 * (0.4 * float(datetime.datetime.now().strftime('%I')))
-        hour_y = height/2 + 15 * -1
-        dc.line((width/2, height/2, hour_x, hour_y), fill=color1, width=4)
+        for timestamp, image_path in recorder.applied:
+            print(f"{datetime.datetime.fromtimestamp(timestamp):%Y-%m-%d %H:%M:%S}  {image_path}")
+        print(f"\nSimulated {start} to {end}")
+        print(f"Transitions: {len(recorder.applied)}")
+        print(f"Wakeups: {self.clock.wakeups}")
+        print(f"CPU time: {cpu_seconds:.3f}s")
+        return True
+    
+    def get_status(self):
+        """Get a snapshot of the live state for control clients"""
+        time_range = self.get_current_time_range()
+        next_change = self.next_transition()
+        return {
+            "pid": os.getpid(),
+            "paused": self.paused.is_set(),
+            "current_image": self.current_bg,
+            "current_range": dict(time_range) if time_range else None,
+            "next_transition": next_change.isoformat() if next_change else None,
+            "time_ranges": len(self.time_ranges),
+            "active_schedules": [rule.name for rule in self.calendar.rules_for(self.clock.now().date())] if self.calendar else [],
+            "config_generation": self.config_generation,
+            "config_watcher": self.config_watcher.backend.name if self.config_watcher else None,
+            "preflight_problems": [
+                {"image": check.path, "problem": check.problem}
+                for check in self.preflight_checks or [] if not check.ok
+            ],
+        }
+    
+    def update_status_metrics(self, status):
+        """Copy the live state from a get_status() snapshot into gauges"""
+        self.metrics.set_gauge("paused", int(status["paused"]))
+        self.metrics.set_gauge("time_ranges", status["time_ranges"])
+        self.metrics.set_gauge("config_generation", status["config_generation"])
+        self.metrics.set_gauge("preflight_problems", len(status["preflight_problems"]))
+        next_change = self.next_transition()
+        self.metrics.set_gauge("next_transition_timestamp_seconds", next_change.timestamp() if next_change else None)
         
-        # Minute hand
-        minute_angle = now.minute * 6
-        minute_x = width/2 + 20 * -1 * (0.4 * float(datetime.datetime.now().strftime('%M')))
-        minute_y = height/2 + 20 * -1
-        dc.line((width/2, height/2, minute_x, minute_y), fill=color1, width=3)
+        current = status["current_range"] or {}
+        upcoming = (self.range_at(next_change) if next_change else None) or {}
+        for name, time_range in (("current_range", current), ("next_range", upcoming)):
+            self.metrics.set_info(
+                name, start=time_range.get("start", ""), end=time_range.get("end", ""), image=time_range.get("image", "")
+            )
+    
+    def get_metrics_dir(self):
+        """Get the folder the status file and Prometheus textfile are written to"""
+        return self.settings.get("metrics_dir") or self.app_path
+    
+    def write_metrics(self):
+        """Write the current status and metrics to the status files"""
+        try:
+            status = self.get_status()
+            self.update_status_metrics(status)
+            self.metrics.write_files(self.get_metrics_dir(), status)
+        except Exception as e:
+            logging.error(f"Error writing metrics: {e}")
+    
+    def metrics_loop(self):
+        """Write the status files periodically until the application exits"""
+        while not self.stop_event.is_set():
+            interval = self.settings.get("metrics_interval_seconds", DEFAULT_DUMP_INTERVAL)
+            if interval <= 0:
+                # Disabled; check again later in case the setting changes
+                self.clock.wait(self.stop_event, DEFAULT_DUMP_INTERVAL)
+                continue
+            self.write_metrics()
+            self.clock.wait(self.stop_event, interval)
+    
+    def request_reload(self):
+        """Reload the configuration on the monitor thread right away"""
+        self.config_changed.set()
+        self.wake_event.set()
+        return "reload requested"
+    
+    def request_apply(self):
+        """Re-apply the wallpaper for the current time even if it looks unchanged"""
+        self.force_apply.set()
+        self.wake_event.set()
+        return "apply requested"
+    
+    def pause(self):
+        """Stop changing the wallpaper until resumed"""
+        self.paused.set()
+        logging.info("Wallpaper changes paused")
+        return "paused"
+    
+    def resume(self):
+        """Resume changing the wallpaper and catch up with the current time"""
+        self.paused.clear()
+        self.wake_event.set()
+        logging.info("Wallpaper changes resumed")
+        return "resumed"
+    
+    def show_running_notice(self):
+        """Tell the user the application is already running, for a repeated launch"""
+        if self.icon is not None:
+            try:
+                self.icon.notify("Time-Based Background Changer is already running.", "TimeBG")
+            except Exception as e:
+                logging.warning(f"Could not show tray notification: {e}")
+        return "shown"
+    
+    def start_control_server(self):
+        """Accept commands from reconfigure and command line clients"""
+        from control_channel import ControlServer
         
-        return image
+        try:
+            self.control_server = ControlServer({
+                "reload": self.request_reload,
+                "apply-now": self.request_apply,
+                "status": self.get_status,
+                "next-transition": lambda: self.get_status()["next_transition"],
+                "pause": self.pause,
+                "resume": self.resume,
+                "show": self.show_running_notice,
+                "metrics": self.metrics.snapshot,
+                "reconfigure": lambda: self.open_reconfigure() or "reconfigure opened",
+            })
+            self.control_server.start()
+        except Exception as e:
+            logging.error(f"Error starting control channel: {e}")
+            self.control_server = None
+    
+    def create_icon_image(self):
+        """Create an icon for the system tray showing the current time"""
+        if self.icon_atlas is None:
+            from clock_icon import ClockIconAtlas
+            self.icon_atlas = ClockIconAtlas()
+        return self.icon_atlas.frame(self.clock.now())
+    
+    def tray_clock_loop(self):
+        """Update the tray clock icon at the start of every minute"""
+        while not self.stop_event.is_set():
+            try:
+                self.icon.icon = self.create_icon_image()
+                self.icon.title = self.get_tooltip_text()
+            except Exception as e:
+                logging.error(f"Error updating tray icon: {e}")
+            
+            now = self.clock.now()
+            self.clock.wait(self.stop_event, 60 - now.second - now.microsecond / 1_000_000)
+    
+    def get_tooltip_text(self):
+        """Get a short tray tooltip with the current range, the next change and apply statistics"""
+        lines = ["Time-Based Background Changer"]
+        time_range = self.get_current_time_range()
+        if time_range:
+            lines.append(f"Now: {time_range.get('start')}-{time_range.get('end')}")
+        lines.append(self.get_next_transition_text())
         
+        changes = self.metrics.counter("wallpaper_changes_total")
+        latency = self.metrics.histogram("set_wallpaper_seconds", kind="single")
+        summary = f"{changes} changes"
+        if latency and latency["count"]:
+            summary += f", avg {latency['mean'] * 1000:.0f} ms"
+        lines.append(summary)
+        # Windows truncates tooltips at 127 characters
+        return "\n".join(lines)[:127]
+    
+    def get_next_transition_text(self):
+        """Get the tray menu text describing the next background change"""
+        next_change = self.next_transition()
+        if next_change is None:
+            return "Next change: none scheduled"
+        return f"Next change: {next_change.strftime('%H:%M')}"
+    
     def setup_tray_icon(self):
         """Setup system tray icon"""
-        image = self.create_icon_image()
-        
-        # Save to temp file - needed for executable mode
-        temp_icon = os.path.join(tempfile.gettempdir(), "time_based_bg_icon.png")
-        image.save(temp_icon)
+        import pystray
         
         # Define tray icon menu
         menu = (
             pystray.MenuItem('Status: Running', lambda: None, enabled=False),
+            pystray.MenuItem(lambda item: self.get_next_transition_text(), lambda: None, enabled=False),
             pystray.MenuItem('Reconfigure', self.open_reconfigure),
             pystray.MenuItem('Exit', self.exit_app)
         )
         
         # Create and run the icon
         self.icon = pystray.Icon("TimeBasedBackground")
-        self.icon.icon = Image.open(temp_icon)
+        self.icon.icon = self.create_icon_image()
         self.icon.menu = pystray.Menu(*menu)
         self.icon.title = "Time-Based Background Changer"
         
         # Start the icon
         self.icon.run_detached()
         logging.info("System tray icon created")
+        
+        # Keep the clock on the icon showing the current time
+        threading.Thread(target=self.tray_clock_loop, daemon=True).start()
     
     def open_reconfigure(self):
-        """Open the reconfiguration tool"""
+        """Open the reconfiguration window inside this process"""
+        try:
+            if self.reconfigure_host is None:
+                # Tkinter is only loaded the first time the window is opened
+                from reconfigure import ReconfigureHost
+                self.reconfigure_host = ReconfigureHost(self)
+            self.reconfigure_host.open()
+            logging.info("Opened hosted reconfiguration window")
+        except Exception as e:
+            logging.error(f"Error opening hosted reconfiguration window, starting a separate process: {e}")
+            self.launch_reconfigure_process()
+    
+    def launch_reconfigure_process(self):
+        """Open the reconfiguration tool in a separate process"""
+        import subprocess
+        
         try:
             logging.info("Launching reconfiguration tool")
             
@@ -1091,33 +1878,60 @@ class TimeBasedBackground:
                 # In a PyInstaller onefile bundle, we need to use the executable directly
                 executable_path = sys.executable
                 logging.info(f"Launching reconfiguration from frozen executable: {executable_path}")
-                subprocess.Popen([executable_path, "--reconfigure"], 
-                                creationflags=subprocess.CREATE_NEW_PROCESS_GROUP)
+                subprocess.Popen([executable_path, "--reconfigure", "--standalone"], 
+                                creationflags=getattr(subprocess, 'CREATE_NEW_PROCESS_GROUP', 0))
             else:
                 # We're running in a normal Python environment
                 reconfigure_script = os.path.join(self.app_path, 'reconfigure.py')
                 python_exec = sys.executable
                 logging.info(f"Launching reconfiguration from script: {python_exec} {reconfigure_script}")
                 subprocess.Popen([python_exec, reconfigure_script], 
-                                creationflags=subprocess.CREATE_NEW_PROCESS_GROUP)
+                                creationflags=getattr(subprocess, 'CREATE_NEW_PROCESS_GROUP', 0))
             
         except Exception as e:
             logging.error(f"Error launching reconfiguration tool: {e}")
-            messagebox.showerror("Error", f"Failed to open reconfiguration tool: {e}")
+            show_error("Error", f"Failed to open reconfiguration tool: {e}")
     
     def exit_app(self):
         """Exit the application gracefully"""
         logging.info("Application exit requested")
         if self.icon:
             self.icon.stop()
+        if self.config_watcher:
+            self.config_watcher.stop()
+        if self.control_server:
+            self.control_server.stop()
+        self.write_metrics()
         self.stop_event.set()
+        self.wake_event.set()
         sys.exit(0)
     
-    def run(self):
-        """Main application entry point"""
+    def get_launch_command(self, *args):
+        """Get the command line that starts this application with the given arguments"""
+        if getattr(sys, 'frozen', False):
+            return [sys.executable, *args]
+        return [sys.executable, os.path.abspath(__file__), *args]
+    
+    def restart_as_daemon(self):
+        """Hand off to a fresh background process that never loads the setup GUI"""
+        import subprocess
+        
+        command = self.get_launch_command("--daemon")
+        logging.info(f"Setup finished, handing off to a lean background process: {command}")
+        # The new process becomes the primary instance
+        if self.instance_lock:
+            self.instance_lock.release()
+        subprocess.Popen(command, creationflags=getattr(subprocess, 'CREATE_NEW_PROCESS_GROUP', 0))
+    
+    def run(self, daemon=False):
+        """Main application entry point; daemon mode never shows the setup GUI"""
         try:
-            # Try to add to startup
-            self.add_to_startup()
+            self.profiler.mark("initialization")
+            
+            # The process that ran setup has already registered for startup
+            if not daemon:
+                self.add_to_startup()
+            self.profiler.mark("startup registration")
             
             # Check for various configuration states
             has_images_config = os.path.exists(self.config_path)
@@ -1144,6 +1958,11 @@ class TimeBasedBackground:
             # Case 4: Neither config exists
             # Action: Show setup pages
             elif not has_images_config:
+                if daemon:
+                    logging.error("Configuration not found in daemon mode, exiting")
+                    show_error("Error", "No configuration found. Please run the application again to set it up.")
+                    sys.exit(1)
+                
                 logging.info("Starting setup process.")
                 
                 # First step: Configure the time points (will save to file if successful)
@@ -1152,18 +1971,39 @@ class TimeBasedBackground:
                 # Try to load the config after setup
                 if not self.load_config():
                     logging.error("Configuration still not found after setup, exiting")
-                    messagebox.showerror("Error", "Failed to create configuration. Application will exit.")
+                    show_error("Error", "Failed to create configuration. Application will exit.")
                     sys.exit(1)
+                
+                # Leave the GUI toolkit behind in this process and keep running in a fresh one
+                self.restart_as_daemon()
+                return
+            self.profiler.mark("configuration")
             
             # Update the background immediately
             self.update_background()
+            self.profiler.mark("first apply")
             
             # Setup system tray icon
             self.setup_tray_icon()
+            self.profiler.mark("tray icon")
+            
+            # Watch the configuration files so edits apply immediately
+            self.start_config_watcher()
+            
+            # Let reconfigure and command line clients talk to this process
+            self.start_control_server()
+            
+            # Keep the status file and Prometheus textfile up to date
+            threading.Thread(target=self.metrics_loop, daemon=True).start()
             
             # Start the background monitor in a separate thread
             monitor_thread = threading.Thread(target=self.background_monitor, daemon=True)
             monitor_thread.start()
+            self.profiler.mark("monitor start")
+            
+            logging.info(f"Startup profile:\n{self.profiler.report()}")
+            if "--startup-profile" in sys.argv:
+                print(f"\nStartup profile:\n{self.profiler.report()}")
             
             # Print a message to the console
             print("\nApplication is running in the background with a system tray icon.")
@@ -1174,6 +2014,8 @@ class TimeBasedBackground:
             # Hide console window after a delay to allow reading the messages
             def hide_console():
                 time.sleep(5)  # Give user time to read messages
+                if sys.platform != 'win32':
+                    return
                 hwnd = ctypes.windll.kernel32.GetConsoleWindow()
                 if hwnd != 0:
                     # SW_HIDE = 0
@@ -1186,8 +2028,8 @@ class TimeBasedBackground:
             
             # Keep the main thread alive to handle keyboard interrupts
             try:
-                while not self.stop_event.is_set():
-                    time.sleep(1)
+                while not self.stop_event.wait(CHECK_INTERVAL):
+                    pass
             except KeyboardInterrupt:
                 self.exit_app()
             
@@ -1197,8 +2039,70 @@ class TimeBasedBackground:
             input("Press Enter to exit...")
 
 if __name__ == "__main__":
+    # Lets worker processes of the frozen executable start up as workers
+    import multiprocessing
+    multiprocessing.freeze_support()
+    
+    if len(sys.argv) > 1 and sys.argv[1] == "--simulate":
+        # Replay the schedule in virtual time: --simulate START END (ISO 8601 datetimes)
+        try:
+            start = datetime.datetime.fromisoformat(sys.argv[2])
+            end = datetime.datetime.fromisoformat(sys.argv[3])
+        except (IndexError, ValueError):
+            print("Usage: main.py --simulate START END  (e.g. 2025-03-29T00:00 2025-03-31T00:00)")
+            sys.exit(2)
+        
+        # Per-transition log lines would dominate a long simulation
+        logging.disable(logging.INFO)
+        app = TimeBasedBackground()
+        sys.exit(0 if app.simulate(start, end) else 1)
+    elif len(sys.argv) > 1 and sys.argv[1] == "--import-folder":
+        # Assign a folder of photos to the time ranges by capture time: --import-folder FOLDER
+        if len(sys.argv) < 3 or not os.path.isdir(sys.argv[2]):
+            print("Usage: main.py --import-folder FOLDER")
+            sys.exit(2)
+        
+        app = TimeBasedBackground()
+        app.load_config()
+        result = app.import_folder(sys.argv[2])
+        if result is None:
+            print("Import failed, see timebased_bg.log for details")
+            sys.exit(1)
+        
+        scanned, assigned, skipped = result
+        print(
+            f"Scanned {scanned} images, assigned images to {assigned} of {len(app.time_ranges)} time ranges, "
+            f"skipped {skipped} unreadable"
+        )
+        from control_channel import send_command, ControlError
+        try:
+            send_command("reload")
+        except ControlError:
+            pass
+        sys.exit(0)
+    elif len(sys.argv) > 1 and sys.argv[1] == "--control":
+        # Send a command to the running application: --control reload|apply-now|status|next-transition|pause|resume
+        from control_channel import send_command, ControlError
+        if len(sys.argv) < 3:
+            print("Usage: main.py --control COMMAND [ARGS...]")
+            sys.exit(2)
+        try:
+            print(json.dumps(send_command(sys.argv[2], *sys.argv[3:]), indent=4))
+            sys.exit(0)
+        except ControlError as e:
+            print(f"Error: {e}")
+            sys.exit(1)
     # Check if we're being called with the --reconfigure argument
-    if len(sys.argv) > 1 and sys.argv[1] == "--reconfigure":
+    elif len(sys.argv) > 1 and sys.argv[1] == "--reconfigure":
+        # Open the editor in the running application if there is one; it is already warm
+        if "--standalone" not in sys.argv:
+            from control_channel import send_command, ControlError
+            try:
+                send_command("reconfigure")
+                sys.exit(0)
+            except ControlError:
+                pass
+        
         # Import and run the reconfiguration tool
         try:
             from reconfigure import ReconfigureTool
@@ -1207,9 +2111,28 @@ if __name__ == "__main__":
             sys.exit(0)
         except Exception as e:
             logging.error(f"Error launching reconfiguration: {e}")
-            messagebox.showerror("Error", f"Failed to launch reconfiguration: {e}")
+            show_error("Error", f"Failed to launch reconfiguration: {e}")
             sys.exit(1)
     else:
         # Run the main application
-        app = TimeBasedBackground()
-        app.run() 
\ No newline at end of file
+        profiler = StartupProfiler()
+        profiler.mark("imports")
+        
+        # Only one instance per user; a repeated launch hands its intent to the running one
+        from single_instance import InstanceLock, forward_to_running_instance
+        from control_channel import ControlError
+        instance_lock = InstanceLock()
+        try:
+            acquired = instance_lock.acquire()
+        except ControlError as e:
+            logging.error(f"Could not take the instance lock: {e}")
+            show_error("Error", f"Failed to start: {e}")
+            sys.exit(1)
+        if not acquired:
+            intent = "reload" if "--reload" in sys.argv else "show"
+            print(f"TimeBG is already running, forwarding '{intent}' to it.")
+            sys.exit(0 if forward_to_running_instance(intent) else 1)
+        profiler.mark("instance lock")
+        
+        app = TimeBasedBackground(profiler=profiler, instance_lock=instance_lock)
+        app.run(daemon="--daemon" in sys.argv) 
\ No newline at end of file
@@ -0,0 +1,161 @@
+import os
+import bisect
+import logging
+import threading
+from config_store import write_json_atomic, write_text_atomic
+
+# Constants
+METRIC_PREFIX = "timebg_"
+LATENCY_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)  # seconds
+LATENESS_BUCKETS = (0.1, 0.5, 1.0, 5.0, 15.0, 60.0, 300.0, 900.0)  # seconds after a boundary
+STATUS_FILE = "timebg_status.json"
+PROMETHEUS_FILE = "timebg.prom"
+DEFAULT_DUMP_INTERVAL = 60  # seconds
+
+def metric_key(name, labels):
+    """Get the registry key of a metric and its labels"""
+    return name, tuple(sorted(labels.items()))
+
+def format_labels(labels, extra=()):
+    """Format labels for the Prometheus text format"""
+    pairs = list(labels) + list(extra)
+    if not pairs:
+        return ""
+    escaped = (
+        (key, str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"'))
+        for key, value in pairs
+    )
+    return "{" + ",".join(f'{key}="{value}"' for key, value in escaped) + "}"
+
+class Histogram:
+    """Cumulative-bucket histogram in the Prometheus style"""
+    __slots__ = ('bounds', 'counts', 'count', 'sum', 'max')
+
+    def __init__(self, bounds):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)  # The last bucket is +Inf
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.bounds, value)] += 1
+        self.count += 1
+        self.sum += value
+        self.max = max(self.max, value)
+
+    def snapshot(self):
+        return {
+            "count": self.count,
+            "sum": self.sum,
+            "max": self.max,
+            "mean": self.sum / self.count if self.count else None,
+            "buckets": {str(bound): count for bound, count in zip(self.bounds + ("+Inf",), self.counts)},
+        }
+
+class MetricsRegistry:
+    """Thread-safe in-process counters, gauges and latency histograms.
+
+    Recording a value is a dictionary update under a lock, so it is cheap
+    enough for the monitor loop and backend calls. Snapshots are written as
+    JSON and in the Prometheus text format, which node_exporter's textfile
+    collector can scrape.
+    """
+    def __init__(self):
+        self._counters = {}
+        self._gauges = {}
+        self._histograms = {}
+        self._info = {}  # name -> dict of labels, exported as a gauge of 1
+        self._lock = threading.Lock()
+
+    def increment(self, name, value=1, **labels):
+        """Add to a counter"""
+        key = metric_key(name, labels)
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def set_gauge(self, name, value, **labels):
+        """Set a gauge to a value, or remove it with None"""
+        key = metric_key(name, labels)
+        with self._lock:
+            if value is None:
+                self._gauges.pop(key, None)
+            else:
+                self._gauges[key] = value
+
+    def set_info(self, name, **labels):
+        """Set the labels of an info metric, such as the current time range"""
+        with self._lock:
+            self._info[name] = labels
+
+    def observe(self, name, value, buckets=LATENCY_BUCKETS, **labels):
+        """Record a value, usually a latency in seconds, in a histogram"""
+        key = metric_key(name, labels)
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = Histogram(buckets)
+            histogram.observe(value)
+
+    def counter(self, name, **labels):
+        """Get the current value of a counter"""
+        with self._lock:
+            return self._counters.get(metric_key(name, labels), 0)
+
+    def histogram(self, name, **labels):
+        """Get a snapshot of a histogram, or None if nothing was recorded"""
+        with self._lock:
+            histogram = self._histograms.get(metric_key(name, labels))
+            return histogram.snapshot() if histogram else None
+
+    def snapshot(self):
+        """Get every metric as a JSON-serializable dictionary"""
+        def name_of(key):
+            name, labels = key
+            return name + format_labels(labels)
+
+        with self._lock:
+            return {
+                "counters": {name_of(key): value for key, value in self._counters.items()},
+                "gauges": {name_of(key): value for key, value in self._gauges.items()},
+                "histograms": {name_of(key): histogram.snapshot() for key, histogram in self._histograms.items()},
+                "info": {name: dict(labels) for name, labels in self._info.items()},
+            }
+
+    def to_prometheus(self):
+        """Render every metric in the Prometheus text exposition format"""
+        lines = []
+        typed = set()
+
+        def header(name, metric_type):
+            if name in typed:
+                return
+            typed.add(name)
+            lines.append(f"# TYPE {METRIC_PREFIX}{name} {metric_type}")
+
+        with self._lock:
+            for (name, labels), value in sorted(self._counters.items()):
+                header(name, "counter")
+                lines.append(f"{METRIC_PREFIX}{name}{format_labels(labels)} {value}")
+            for (name, labels), value in sorted(self._gauges.items()):
+                header(name, "gauge")
+                lines.append(f"{METRIC_PREFIX}{name}{format_labels(labels)} {value}")
+            for name, labels in sorted(self._info.items()):
+                header(name, "gauge")
+                lines.append(f"{METRIC_PREFIX}{name}{format_labels(sorted(labels.items()))} 1")
+            for (name, labels), histogram in sorted(self._histograms.items()):
+                header(name, "histogram")
+                cumulative = 0
+                for bound, count in zip(histogram.bounds + ("+Inf",), histogram.counts):
+                    cumulative += count
+                    lines.append(f"{METRIC_PREFIX}{name}_bucket{format_labels(labels, [('le', bound)])} {cumulative}")
+                lines.append(f"{METRIC_PREFIX}{name}_sum{format_labels(labels)} {histogram.sum}")
+                lines.append(f"{METRIC_PREFIX}{name}_count{format_labels(labels)} {histogram.count}")
+        return "\n".join(lines) + "\n"
+
+    def write_files(self, directory, status=None):
+        """Atomically write the metrics as a JSON status file and a Prometheus textfile"""
+        os.makedirs(directory, exist_ok=True)
+        write_json_atomic(os.path.join(directory, STATUS_FILE), dict(status or {}, metrics=self.snapshot()))
+        write_text_atomic(os.path.join(directory, PROMETHEUS_FILE), self.to_prometheus())
+        logging.debug(f"Wrote metrics to {directory}")
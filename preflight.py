@@ -0,0 +1,121 @@
+import os
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from composite import configured_images
+
+# Constants
+MAX_WORKERS = 8
+DECODE_SCALE = 8  # Decode at 1/8 size; enough to find truncated or corrupt files
+DRAFT_FORMATS = frozenset({"JPEG"})  # Formats Pillow can decode at reduced size through draft()
+
+class ImageCheck:
+    """Result of validating one image file"""
+    def __init__(self, path, problem=None, image_format=None, size=None, warning=None):
+        self.path = path
+        self.problem = problem  # Reason the image cannot be used, or None
+        self.format = image_format
+        self.size = size
+        self.warning = warning  # Usable, but worth knowing about
+
+    @property
+    def ok(self):
+        return self.problem is None
+
+class ImageValidator:
+    """Checks that configured images exist and decode, memoized by path, size and modification time"""
+    def __init__(self, max_workers=None):
+        self.max_workers = max_workers or min(MAX_WORKERS, os.cpu_count() or 1)
+        self._cache = {}
+        self._lock = threading.Lock()
+
+    def check_image(self, path, supported_formats=None, display_size=None):
+        """Validate one image: it must exist, decode, and be in a format the backend can use"""
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return ImageCheck(path, problem="file not found")
+
+        key = (stat.st_size, stat.st_mtime_ns)
+        with self._lock:
+            cached = self._cache.get(path)
+        if cached and cached[0] == key:
+            check = cached[1]
+        else:
+            check = self._decode(path)
+            with self._lock:
+                self._cache[path] = (key, check)
+
+        # Backend and display checks are cheap, so they are not cached
+        if check.ok and supported_formats is not None and check.format not in supported_formats:
+            return ImageCheck(path, problem=f"{check.format} images are not supported by this wallpaper backend",
+                              image_format=check.format, size=check.size)
+        if check.ok and display_size and (check.size[0] < display_size[0] or check.size[1] < display_size[1]):
+            return ImageCheck(path, image_format=check.format, size=check.size,
+                              warning=f"{check.size[0]}x{check.size[1]} is smaller than the "
+                                      f"{display_size[0]}x{display_size[1]} display and will be upscaled")
+        return check
+
+    def _decode(self, path):
+        """Read an image's header and check its data without decoding it at full size.
+
+        Only JPEGs are decoded, at reduced size through draft(). For other
+        formats draft() does nothing, so a full decode of every large PNG would
+        run in parallel; verify() checks their structure without the pixels.
+        """
+        from PIL import Image
+
+        try:
+            with Image.open(path) as image:
+                image_format = image.format
+                size = image.size
+                if size[0] < 1 or size[1] < 1:
+                    return ImageCheck(path, problem="image has no pixels", image_format=image_format, size=size)
+                if image_format in DRAFT_FORMATS:
+                    image.draft('RGB', (max(1, size[0] // DECODE_SCALE), max(1, size[1] // DECODE_SCALE)))
+                    image.load()
+                else:
+                    image.verify()
+            return ImageCheck(path, image_format=image_format, size=size)
+        except Exception as e:
+            return ImageCheck(path, problem=f"cannot be decoded: {e}")
+
+    def check_images(self, paths, supported_formats=None, display_size=None):
+        """Validate several images concurrently; returns checks in the order of the unique paths"""
+        unique_paths = list(dict.fromkeys(path for path in paths if path))
+        if len(unique_paths) <= 1:
+            return [self.check_image(path, supported_formats, display_size) for path in unique_paths]
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            return list(executor.map(
+                lambda path: self.check_image(path, supported_formats, display_size), unique_paths
+            ))
+
+def format_report(checks, time_ranges=()):
+    """Describe the problems and warnings found by a preflight check"""
+    ranges_by_image = {}
+    for time_range in time_ranges:
+        for image in configured_images(time_range):
+            ranges_by_image.setdefault(image, []).append(
+                f"{time_range.get('start')}-{time_range.get('end')}"
+            )
+
+    problems = [check for check in checks if not check.ok]
+    warnings = [check for check in checks if check.ok and check.warning]
+    lines = [f"Preflight: {len(checks)} images checked, {len(problems)} problems, {len(warnings)} warnings"]
+    for label, entries, reason in (("ERROR", problems, "problem"), ("WARNING", warnings, "warning")):
+        for check in entries:
+            used_by = ", ".join(ranges_by_image.get(check.path, []))
+            suffix = f" (used by {used_by})" if used_by else ""
+            lines.append(f"  {label}: {check.path}: {getattr(check, reason)}{suffix}")
+    return "\n".join(lines)
+
+def log_report(checks, time_ranges=()):
+    """Write a preflight report to the log at a level matching its worst finding"""
+    report = format_report(checks, time_ranges)
+    if any(not check.ok for check in checks):
+        logging.error(report)
+    elif any(check.warning for check in checks):
+        logging.warning(report)
+    else:
+        logging.info(report)
+    return report
@@ -1,11 +1,19 @@
 import os
 import sys
+import copy
 import json
+import time
+import queue
+import threading
 import tkinter as tk
 from tkinter import filedialog
 from tkinter import messagebox
+import logging
 import traceback
 import ctypes  # Added for hiding console window
+from config_store import save_config_file
+from virtual_list import VirtualRowList
+from thumbnails import ThumbnailLoader, THUMBNAIL_CACHE_DIR
 
 # Get application path for both script and frozen exe
 def get_application_path():
@@ -18,31 +26,59 @@ def get_application_path():
         
 CONFIG_FILE = "images_config.json"
 TIME_POINTS_CONFIG_FILE = "time_points_config.json"
+RAISE_POLL_INTERVAL = 200  # ms between checks for requests to bring the hosted window forward
+IMPORT_POLL_INTERVAL = 100  # ms between checks for a finished folder scan
 
 class ReconfigureTool:
-    def __init__(self):
-        self.app_path = get_application_path()
+    def __init__(self, app=None, raise_requests=None):
+        # When hosted by the running application, edits are saved through it
+        self.app = app
+        self.raise_requests = raise_requests  # Queue of requests to bring the window forward
+        self.requested_at = None  # perf_counter() time the hosted window was asked for
+        self.range_list = None
+        self.import_scan = None  # (future, perf_counter() start) of a running folder scan
+        self.app_path = app.app_path if app else get_application_path()
         self.config_path = os.path.join(self.app_path, CONFIG_FILE)
         self.time_points_config_path = os.path.join(self.app_path, TIME_POINTS_CONFIG_FILE)
-        print(f"Config path: {self.config_path}")
-        print(f"Time points config path: {self.time_points_config_path}")
+        self.log(f"Config path: {self.config_path}")
+        self.log(f"Time points config path: {self.time_points_config_path}")
         self.time_ranges = []
+        self.settings = {}  # Preserved as-is when saving
+        self.schedules = []  # Calendar rules; preserved as-is when saving
         self.load_existing_config()
+    
+    def log(self, message, level=logging.INFO, exc_info=False):
+        """Print a message, or log it when hosted by the running application, which has no console"""
+        if self.app is not None:
+            logging.log(level, message, exc_info=exc_info)
+            return
+        print(message)
+        if exc_info:
+            traceback.print_exc()
         
     def load_existing_config(self):
         """Load existing configuration if available"""
+        if self.app is not None and self.app.time_ranges:
+            # Edit a copy so the live schedule only changes on save
+            self.time_ranges = copy.deepcopy(self.app.time_ranges)
+            self.schedules = copy.deepcopy(self.app.schedules)
+            self.settings = dict(self.app.settings)
+            self.log(f"Loaded live configuration with {len(self.time_ranges)} time ranges")
+            return True
         if os.path.exists(self.config_path):
             try:
                 with open(self.config_path, 'r') as f:
                     config = json.load(f)
                     self.time_ranges = config.get('time_ranges', [])
-                print(f"Loaded configuration with {len(self.time_ranges)} time ranges")
+                    self.schedules = config.get('schedules', [])
+                    self.settings = config.get('settings', {})
+                self.log(f"Loaded configuration with {len(self.time_ranges)} time ranges")
                 return True
             except Exception as e:
-                print(f"Error loading configuration: {e}")
+                self.log(f"Error loading configuration: {e}", logging.ERROR)
                 return False
         else:
-            print("Configuration file does not exist. A new one will be created.")
+            self.log("Configuration file does not exist. A new one will be created.")
             # Define default time points
             self.create_default_time_ranges()
             return False
@@ -54,13 +90,13 @@ class ReconfigureTool:
                 with open(self.time_points_config_path, 'r') as f:
                     config = json.load(f)
                     time_points = config.get('time_points', [])
-                print(f"Loaded time points configuration with {len(time_points)} time points")
+                self.log(f"Loaded time points configuration with {len(time_points)} time points")
                 return time_points
             except Exception as e:
-                print(f"Error loading time points configuration: {e}")
+                self.log(f"Error loading time points configuration: {e}", logging.ERROR)
                 return None
         else:
-            print("Time points configuration file does not exist")
+            self.log("Time points configuration file does not exist")
             return None
     
     def create_default_time_ranges(self):
@@ -90,7 +126,7 @@ class ReconfigureTool:
         try:
             # Make sure we have valid data
             if not self.time_ranges:
-                print("Error: No time ranges to save!")
+                self.log("Error: No time ranges to save!", logging.ERROR)
                 return False
                 
             # Ensure the config has valid data
@@ -101,24 +137,62 @@ class ReconfigureTool:
                     break
                     
             if not valid_entries:
-                print("Error: No valid image paths found in configuration!")
+                self.log("Error: No valid image paths found in configuration!", logging.ERROR)
                 return False
                 
-            with open(self.config_path, 'w') as f:
-                json.dump({'time_ranges': self.time_ranges}, f, indent=4)
-            print(f"Configuration saved successfully to {self.config_path}")
+            if self.app is not None:
+                # Hosted by the running application: save through it; its monitor thread reloads the file
+                if not self.app.update_time_ranges(copy.deepcopy(self.time_ranges), copy.deepcopy(self.schedules)):
+                    return False
+                self.log("Configuration saved, the running application is reloading it")
+                return True
+            
+            config = {'time_ranges': self.time_ranges}
+            if self.schedules:
+                config['schedules'] = self.schedules
+            if self.settings:
+                config['settings'] = self.settings
+            save_config_file(self.config_path, config)
+            self.log(f"Configuration saved successfully to {self.config_path}")
+            self.notify_daemon()
             return True
         except Exception as e:
-            print(f"Error saving configuration: {e}")
-            traceback.print_exc()
+            self.log(f"Error saving configuration: {e}", logging.ERROR, exc_info=True)
             return False
     
+    def check_images(self):
+        """Validate every assigned image concurrently and return the checks and a report"""
+        if self.app is not None:
+            # The running application also knows the display size and backend formats
+            return self.app.check_images(self.time_ranges)
+        
+        from preflight import ImageValidator, format_report
+        from composite import configured_images
+        checks = ImageValidator().check_images(
+            [image for time_range in self.time_ranges for image in configured_images(time_range)]
+        )
+        return checks, format_report(checks, self.time_ranges)
+    
+    def notify_daemon(self):
+        """Ask the running application to reload right away instead of waiting for its file check"""
+        try:
+            from control_channel import send_command, ControlError
+            send_command("reload")
+            self.log("Running application notified to reload")
+        except ControlError as e:
+            self.log(f"Could not notify running application: {e}", logging.WARNING)
+        except Exception as e:
+            self.log(f"Error notifying running application: {e}", logging.ERROR)
+    
     def configure_time_points(self):
         """Open the time points configuration window"""
-        # Import the main module to access the TimeBasedBackground class
         try:
-            import main
-            app = main.TimeBasedBackground()
+            if self.app is not None:
+                app = self.app
+            else:
+                # Import the main module to access the TimeBasedBackground class
+                import main
+                app = main.TimeBasedBackground()
             
             # Show the time points setup interface
             time_points = app.setup_time_points()
@@ -134,32 +208,84 @@ class ReconfigureTool:
                     start = time_points[i]
                     end = time_points[(i + 1) % len(time_points)]
                     
-                    # Find existing images for this time range
-                    image_path = ""
+                    # Find existing images for this time range, including per-monitor ones
+                    new_range = {"start": start, "end": end, "image": ""}
                     for tr in self.time_ranges:
                         if tr["start"] == start and tr["end"] == end:
-                            image_path = tr.get("image", "")
+                            new_range.update(tr)
                             break
                     
-                    new_time_ranges.append({
-                        "start": start,
-                        "end": end,
-                        "image": image_path
-                    })
+                    new_time_ranges.append(new_range)
                 
-                # Update time ranges and redraw UI
+                # Update time ranges and rebind the visible rows; no widgets are rebuilt
                 self.time_ranges = new_time_ranges
+                self.range_list.set_count(len(self.time_ranges))
                 
-                # Reload the UI
-                messagebox.showinfo("Success", "Time points updated successfully. The UI will now reload.")
-                self.root.destroy()
-                self.run_gui()
+                messagebox.showinfo("Success", "Time points updated successfully.")
             
         except Exception as e:
-            print(f"Error configuring time points: {e}")
-            traceback.print_exc()
+            self.log(f"Error configuring time points: {e}", logging.ERROR, exc_info=True)
             messagebox.showerror("Error", f"Failed to configure time points: {e}")
     
+    def import_folder(self):
+        """Assign the photos in a folder to the time ranges by capture time and save them.
+
+        The folder is scanned on a background thread so the window stays
+        responsive; the Tk thread polls for the result and assigns the images.
+        """
+        try:
+            if self.import_scan is not None:
+                return
+            folder = filedialog.askdirectory(title="Select a Folder of Photos")
+            if not folder:
+                return
+            
+            import multiprocessing
+            from concurrent.futures import ThreadPoolExecutor
+            from folder_import import scan_folder
+            # Forking a process with other threads running, like the hosting daemon, is unsafe
+            mp_context = multiprocessing.get_context("spawn")
+            executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="folder-import")
+            self.import_scan = (executor.submit(scan_folder, folder, mp_context=mp_context), time.perf_counter())
+            executor.shutdown(wait=False)
+            self.root.config(cursor="watch")
+            self.root.after(IMPORT_POLL_INTERVAL, self.finish_import_folder)
+        except Exception as e:
+            self.log(f"Error importing folder: {e}", logging.ERROR, exc_info=True)
+            messagebox.showerror("Error", f"Failed to import folder: {e}")
+    
+    def finish_import_folder(self):
+        """Assign the scanned photos once the background scan is done; runs on the Tk thread"""
+        future, start = self.import_scan
+        if not future.done():
+            self.root.after(IMPORT_POLL_INTERVAL, self.finish_import_folder)
+            return
+        
+        self.import_scan = None
+        try:
+            self.root.config(cursor="")
+            captures = future.result()
+            from folder_import import assign_images
+            self.time_ranges, self.schedules, assigned = assign_images(
+                self.time_ranges, captures, self.schedules, self.settings
+            )
+            skipped = sum(1 for _, taken, _ in captures if taken is None)
+            self.log(f"Scanned {len(captures)} images in {time.perf_counter() - start:.2f}s, skipped {skipped} unreadable")
+            
+            self.range_list.set_count(len(self.time_ranges))
+            if not assigned:
+                messagebox.showwarning("No Images Assigned", f"None of the {len(captures)} images in the folder could be assigned.")
+            elif self.save_config():
+                messagebox.showinfo(
+                    "Import Complete",
+                    f"Assigned images to {assigned} of {len(self.time_ranges)} time ranges from {len(captures)} images."
+                )
+            else:
+                messagebox.showerror("Error", "Failed to save configuration!")
+        except Exception as e:
+            self.log(f"Error importing folder: {e}", logging.ERROR, exc_info=True)
+            messagebox.showerror("Error", f"Failed to import folder: {e}")
+    
     def run_gui(self):
         """Run the GUI to reconfigure time ranges"""
         try:
@@ -191,6 +317,7 @@ class ReconfigureTool:
             options_menu = tk.Menu(menubar, tearoff=0)
             menubar.add_cascade(label="Options", menu=options_menu)
             options_menu.add_command(label="Configure Time Points", command=self.configure_time_points)
+            options_menu.add_command(label="Import Folder...", command=self.import_folder)
             
             # Create main frame
             main_frame = tk.Frame(root, bg="#f0f0f0", padx=20, pady=20)
@@ -222,10 +349,20 @@ class ReconfigureTool:
             )
             header_time.pack(side=tk.LEFT)
             
+            header_preview = tk.Label(
+                header_frame, 
+                text="Preview", 
+                width=8, 
+                font=("Arial", 11, "bold"), 
+                bg=HEADER_BG, 
+                fg=HEADER_FG
+            )
+            header_preview.pack(side=tk.LEFT)
+            
             header_path = tk.Label(
                 header_frame, 
                 text="Image Path", 
-                width=40, 
+                width=32, 
                 font=("Arial", 11, "bold"), 
                 bg=HEADER_BG, 
                 fg=HEADER_FG
@@ -242,53 +379,6 @@ class ReconfigureTool:
             )
             header_action.pack(side=tk.LEFT)
             
-            # Create a frame to hold the canvas and scrollbar
-            scroll_frame = tk.Frame(main_frame, bg="#f0f0f0")
-            scroll_frame.pack(fill=tk.BOTH, expand=True, pady=(0, 10))
-            
-            # Create a canvas for scrolling
-            canvas = tk.Canvas(scroll_frame, bg="#f0f0f0", highlightthickness=0)
-            scrollbar = tk.Scrollbar(scroll_frame, orient="vertical", command=canvas.yview)
-            
-            # Configure the canvas
-            canvas.configure(yscrollcommand=scrollbar.set)
-            
-            # Pack the scrollbar and canvas
-            scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
-            canvas.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
-            
-            # Create a frame inside the canvas for entries
-            entries_frame = tk.Frame(canvas, bg="#f0f0f0")
-            
-            # Add the entries frame to the canvas
-            canvas_window = canvas.create_window((0, 0), window=entries_frame, anchor="nw")
-            
-            # Configure the scrolling
-            def on_frame_configure(event):
-                canvas.configure(scrollregion=canvas.bbox("all"))
-                
-            # Configure the canvas window to stretch horizontally
-            def on_canvas_configure(event):
-                canvas.itemconfig(canvas_window, width=event.width)
-                
-            # Bind events for scrolling
-            entries_frame.bind("<Configure>", on_frame_configure)
-            canvas.bind("<Configure>", on_canvas_configure)
-            
-            # Enable mousewheel scrolling
-            def on_mousewheel(event):
-                canvas.yview_scroll(int(-1 * (event.delta / 120)), "units")
-            
-            canvas.bind_all("<MouseWheel>", on_mousewheel)
-            
-            # Bind additional events for better scrolling
-            canvas.bind("<Enter>", lambda e: canvas.bind_all("<MouseWheel>", on_mousewheel))
-            canvas.bind("<Leave>", lambda e: canvas.unbind_all("<MouseWheel>"))
-            
-            # Store path variables and buttons
-            path_vars = {}
-            buttons = {}
-            
             # Function to browse for an image
             def browse_image(index):
                 try:
@@ -297,49 +387,42 @@ class ReconfigureTool:
                         filetypes=(("Image files", "*.jpg;*.jpeg;*.png;*.bmp"), ("All files", "*.*"))
                     )
                     if filename:
-                        path_vars[index].set(filename)
-                        buttons[index].config(text="Change")
+                        self.time_ranges[index]["image"] = filename
+                        # Only the row showing this range needs updating
+                        self.range_list.refresh(index)
                 except Exception as e:
-                    print(f"Error browsing for image: {e}")
+                    self.log(f"Error browsing for image: {e}", logging.ERROR)
                     messagebox.showerror("Error", f"Failed to select image: {e}")
             
-            # Add time range entries
-            for i, time_range in enumerate(self.time_ranges):
-                # Alternate background colors for rows
-                bg_color = ROW_BG_1 if i % 2 == 0 else ROW_BG_2
-                
-                row_frame = tk.Frame(entries_frame, bg=bg_color, pady=8, padx=5)
-                row_frame.pack(fill=tk.X, pady=2)
+            # Build one recycled row; it shows whichever time range it is bound to
+            def create_range_row(parent):
+                row = {}
+                row["frame"] = row_frame = tk.Frame(parent, pady=8, padx=5)
                 
                 # Time range label
-                time_label = tk.Label(
-                    row_frame, 
-                    text=f"{time_range['start']} to {time_range['end']}", 
-                    width=20,
-                    font=("Arial", 10),
-                    bg=bg_color
-                )
-                time_label.pack(side=tk.LEFT)
+                row["label"] = tk.Label(row_frame, width=20, font=("Arial", 10))
+                row["label"].pack(side=tk.LEFT)
                 
-                # Path variable and entry
-                path_var = tk.StringVar(value=time_range.get("image", ""))
-                path_vars[i] = path_var
+                # Thumbnail preview; a placeholder until the image is decoded
+                row["thumbnail"] = tk.Label(row_frame, image=thumbnail_loader.placeholder)
+                row["thumbnail"].pack(side=tk.LEFT, padx=5)
                 
+                # Path variable and entry
+                row["path"] = tk.StringVar()
                 path_entry = tk.Entry(
                     row_frame, 
-                    textvariable=path_var, 
-                    width=40, 
+                    textvariable=row["path"], 
+                    width=32, 
                     readonlybackground="white"
                 )
                 path_entry.configure(state="readonly")
                 path_entry.pack(side=tk.LEFT, padx=5)
                 
                 # Browse button
-                button_text = "Change" if time_range.get("image") else "Choose"
-                browse_button = tk.Button(
+                row["button"] = tk.Button(
                     row_frame,
-                    text=button_text,
-                    command=lambda idx=i: browse_image(idx),
+                    text="Choose",
+                    command=lambda: browse_image(row["index"]),
                     width=10,
                     bg=BUTTON_BG,
                     activebackground=BUTTON_ACTIVE_BG,
@@ -348,8 +431,37 @@ class ReconfigureTool:
                     relief=tk.RAISED,
                     bd=2
                 )
-                buttons[i] = browse_button
-                browse_button.pack(side=tk.LEFT)
+                row["button"].pack(side=tk.LEFT)
+                return row
+            
+            # Show a time range in a recycled row
+            def bind_range_row(row, index):
+                # Alternate background colors for rows
+                bg_color = ROW_BG_1 if index % 2 == 0 else ROW_BG_2
+                time_range = self.time_ranges[index]
+                row["frame"].config(bg=bg_color)
+                row["label"].config(text=f"{time_range['start']} to {time_range['end']}", bg=bg_color)
+                row["path"].set(time_range.get("image", ""))
+                row["thumbnail"].config(image=thumbnail_loader.get(time_range.get("image", "")))
+                row["button"].config(text="Change" if time_range.get("image") else "Choose")
+            
+            # Refresh the rows showing an image once its thumbnail is ready
+            def on_thumbnail_ready(image_path):
+                for row in self.range_list.rows:
+                    if row["index"] is not None and self.time_ranges[row["index"]].get("image") == image_path:
+                        self.range_list.refresh(row["index"])
+            
+            # Thumbnails are decoded off the Tk thread and cached on disk
+            thumbnail_loader = ThumbnailLoader(
+                root, os.path.join(self.app_path, THUMBNAIL_CACHE_DIR), on_thumbnail_ready
+            )
+            
+            # Only the rows on screen have widgets, so long schedules open quickly
+            self.range_list = VirtualRowList(
+                main_frame, create_range_row, bind_range_row,
+                row_count=len(self.time_ranges)
+            )
+            self.range_list.frame.pack(fill=tk.BOTH, expand=True, pady=(0, 10))
             
             # Button frame
             button_frame = tk.Frame(main_frame, bg="#f0f0f0", pady=15)
@@ -359,11 +471,7 @@ class ReconfigureTool:
             def save_config():
                 try:
                     # Check if at least one image is selected
-                    has_image = False
-                    for i in range(len(self.time_ranges)):
-                        if path_vars[i].get().strip():
-                            has_image = True
-                            break
+                    has_image = any(time_range.get("image", "").strip() for time_range in self.time_ranges)
                     
                     if not has_image:
                         messagebox.showwarning(
@@ -372,9 +480,14 @@ class ReconfigureTool:
                         )
                         return
                     
-                    # Update time ranges with selected images
-                    for i, time_range in enumerate(self.time_ranges):
-                        time_range["image"] = path_vars[i].get()
+                    # Check every image now rather than when its time slot arrives
+                    checks, report = self.check_images()
+                    if self.app is None:
+                        # The running application has already logged it
+                        print(report)
+                    if any(not check.ok for check in checks):
+                        if not messagebox.askyesno("Image Problems", f"{report}\n\nSave anyway?"):
+                            return
                     
                     # Save to file
                     if self.save_config():
@@ -390,7 +503,7 @@ class ReconfigureTool:
                     else:
                         messagebox.showerror("Error", "Failed to save configuration!")
                 except Exception as e:
-                    print(f"Error saving configuration: {e}")
+                    self.log(f"Error saving configuration: {e}", logging.ERROR, exc_info=True)
                     messagebox.showerror("Error", f"Error saving configuration: {e}")
             
             # Cancel function
@@ -405,7 +518,7 @@ class ReconfigureTool:
                         root.quit()
                         root.destroy()
                 except Exception as e:
-                    print(f"Error canceling: {e}")
+                    self.log(f"Error canceling: {e}", logging.ERROR)
                     root.destroy()
             
             # Make sure window closes properly
@@ -467,18 +580,68 @@ class ReconfigureTool:
             root.attributes('-topmost', True)
             root.update()
             root.attributes('-topmost', False)
-            
-            # Configure the scroll region for proper scrolling
-            root.update_idletasks()
-            canvas.configure(scrollregion=canvas.bbox("all"))
+            if self.requested_at is not None:
+                self.log(f"Reconfiguration window shown in {time.perf_counter() - self.requested_at:.3f}s")
+            
+            if self.raise_requests is not None:
+                # Another open request while the window is up brings it to the front
+                def check_raise_requests():
+                    try:
+                        while True:
+                            self.raise_requests.get_nowait()
+                            root.deiconify()
+                            root.lift()
+                            root.focus_force()
+                    except queue.Empty:
+                        pass
+                    root.after(RAISE_POLL_INTERVAL, check_raise_requests)
+                
+                root.after(RAISE_POLL_INTERVAL, check_raise_requests)
             
             root.mainloop()
             
         except Exception as e:
-            print(f"Error in reconfiguration GUI: {e}")
-            traceback.print_exc()
+            self.log(f"Error in reconfiguration GUI: {e}", logging.ERROR, exc_info=True)
             messagebox.showerror("Error", f"An error occurred: {e}")
 
+class ReconfigureHost:
+    """Hosts the reconfiguration window on a dedicated UI thread of the running application.
+
+    Nothing is created until the window is first opened. The thread then
+    stays around, so later openings only build the window. Opening it while
+    it is already shown brings it to the front instead.
+    """
+    def __init__(self, app):
+        self.app = app
+        self.requests = queue.Queue()
+        self.thread = None
+        self.lock = threading.Lock()
+    
+    def open(self):
+        """Show the reconfiguration window, starting the UI thread if needed"""
+        self.requests.put(time.perf_counter())
+        with self.lock:
+            if self.thread is None or not self.thread.is_alive():
+                self.thread = threading.Thread(target=self._run, name="reconfigure-ui", daemon=True)
+                self.thread.start()
+    
+    def _run(self):
+        while True:
+            requested_at = self.requests.get()
+            # Requests that piled up before the window opens are served by it
+            try:
+                while True:
+                    self.requests.get_nowait()
+            except queue.Empty:
+                pass
+            
+            try:
+                tool = ReconfigureTool(app=self.app, raise_requests=self.requests)
+                tool.requested_at = requested_at
+                tool.run_gui()
+            except Exception as e:
+                logging.error(f"Error in hosted reconfiguration window: {e}", exc_info=True)
+
 if __name__ == "__main__":
     tool = ReconfigureTool()
     tool.run_gui() 
\ No newline at end of file
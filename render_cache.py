@@ -0,0 +1,144 @@
+import os
+import hashlib
+import logging
+import threading
+
+# Constants
+FIT_MODES = ("fill", "fit", "stretch", "center")
+DEFAULT_FIT_MODE = "fill"
+DEFAULT_BUDGET_MB = 512
+RENDER_EXTENSION = ".bmp"  # Uncompressed, so the OS can load it without decoding
+BACKGROUND_COLOR = (0, 0, 0)
+EXIF_ORIENTATION = 0x0112
+TRANSPOSED_ORIENTATIONS = (5, 6, 7, 8)  # Orientations that turn the stored image by 90 degrees
+
+class ContentHasher:
+    """Hash file contents, memoized by path, size and modification time"""
+    def __init__(self):
+        self._cache = {}
+        self._lock = threading.Lock()
+
+    def hash_file(self, path):
+        """Get a hex digest of the file's contents"""
+        stat = os.stat(path)
+        key = (stat.st_size, stat.st_mtime_ns)
+        with self._lock:
+            cached = self._cache.get(path)
+        if cached and cached[0] == key:
+            return cached[1]
+
+        digest = hashlib.blake2b(digest_size=16)
+        with open(path, 'rb') as f:
+            for chunk in iter(lambda: f.read(1024 * 1024), b''):
+                digest.update(chunk)
+        content_hash = digest.hexdigest()
+
+        with self._lock:
+            self._cache[path] = (key, content_hash)
+        return content_hash
+
+def stored_size(image, size):
+    """Get a display-oriented size in the axes the image is stored in, before its EXIF rotation"""
+    if image.getexif().get(EXIF_ORIENTATION) in TRANSPOSED_ORIENTATIONS:
+        return size[1], size[0]
+    return size
+
+def render_image(image, size, fit_mode):
+    """Render an image onto a canvas of the given size using a fit mode"""
+    from PIL import Image, ImageOps
+
+    width, height = size
+    image = ImageOps.exif_transpose(image).convert('RGB')
+
+    if fit_mode == "stretch":
+        return image.resize(size, Image.LANCZOS)
+    if fit_mode == "fill":
+        return ImageOps.fit(image, size, Image.LANCZOS)
+
+    if fit_mode == "fit":
+        scale = min(width / image.width, height / image.height)
+        scaled_size = (max(1, round(image.width * scale)), max(1, round(image.height * scale)))
+        image = image.resize(scaled_size, Image.LANCZOS)
+    elif fit_mode != "center":
+        raise ValueError(f"Unknown fit mode: {fit_mode}")
+
+    # Center on the canvas; images larger than the display are cropped
+    canvas = Image.new('RGB', size, BACKGROUND_COLOR)
+    canvas.paste(image, ((width - image.width) // 2, (height - image.height) // 2))
+    return canvas
+
+class RenderCache:
+    """Content-addressed cache of images pre-rendered to the display size.
+
+    Entries are keyed by the source file's content hash, the target size and
+    the fit mode. Least recently used entries are evicted once the cache
+    grows past its byte budget.
+    """
+    def __init__(self, cache_dir, budget_bytes=DEFAULT_BUDGET_MB * 1024 * 1024, hasher=None):
+        self.cache_dir = cache_dir
+        self.budget_bytes = budget_bytes
+        self.hasher = hasher or ContentHasher()
+        self._lock = threading.Lock()
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+    def cache_path(self, image_path, size, fit_mode):
+        """Get the cache file path for an image rendered at a size and fit mode"""
+        content_hash = self.hasher.hash_file(image_path)
+        width, height = size
+        return os.path.join(self.cache_dir, f"{content_hash}_{width}x{height}_{fit_mode}{RENDER_EXTENSION}")
+
+    def contains(self, image_path, size, fit_mode):
+        """Check whether a rendered copy is already cached"""
+        return os.path.exists(self.cache_path(image_path, size, fit_mode))
+
+    def get(self, image_path, size, fit_mode=DEFAULT_FIT_MODE):
+        """Get the path of a rendered copy of the image, rendering it on a cache miss"""
+        if fit_mode not in FIT_MODES:
+            raise ValueError(f"Unknown fit mode: {fit_mode}")
+
+        with self._lock:
+            path = self.cache_path(image_path, size, fit_mode)
+            if os.path.exists(path):
+                # Touch the entry so eviction treats it as recently used
+                os.utime(path, None)
+                return path
+
+            # Pillow is only loaded on a cache miss
+            from PIL import Image
+            with Image.open(image_path) as image:
+                if fit_mode != "center":
+                    # Let JPEG decoding skip detail that would be scaled away; draft works before rotation
+                    image.draft('RGB', stored_size(image, size))
+                rendered = render_image(image, size, fit_mode)
+
+            temp_path = path + ".tmp"
+            rendered.save(temp_path, "BMP")
+            os.replace(temp_path, path)
+            logging.info(f"Rendered {image_path} at {size[0]}x{size[1]} ({fit_mode})")
+
+            self.evict(keep=path)
+            return path
+
+    def evict(self, keep=None):
+        """Remove least recently used entries until the cache fits its budget"""
+        entries = []
+        total = 0
+        for entry in os.scandir(self.cache_dir):
+            if not entry.name.endswith(RENDER_EXTENSION):
+                continue
+            stat = entry.stat()
+            entries.append((stat.st_mtime, stat.st_size, entry.path))
+            total += stat.st_size
+
+        entries.sort()
+        for _, entry_size, entry_path in entries:
+            if total <= self.budget_bytes:
+                break
+            if entry_path == keep:
+                continue
+            try:
+                os.remove(entry_path)
+                total -= entry_size
+                logging.info(f"Evicted rendered wallpaper: {entry_path}")
+            except OSError as e:
+                logging.warning(f"Could not evict {entry_path}: {e}")
@@ -0,0 +1,174 @@
+import bisect
+import logging
+import datetime
+from solar import parse_solar_time_point
+
+# Constants
+MINUTES_PER_DAY = 24 * 60
+
+def parse_time_point(value, solar_times=None):
+    """Convert an "HH:MM" or solar time point like "sunset-30" into minutes since midnight.
+
+    Solar time points need solar_times, the local minute of each solar event
+    on the day being compiled.
+    """
+    solar = parse_solar_time_point(value)
+    if solar is not None:
+        event, offset = solar
+        if solar_times is None:
+            raise ValueError(f"Solar time point without a configured location: {value}")
+        if solar_times.get(event) is None:
+            raise ValueError(f"No {event} on this day: {value}")
+        return (solar_times[event] + offset) % MINUTES_PER_DAY
+
+    hours, minutes = map(int, value.split(':'))
+    if not (0 <= hours <= 23 and 0 <= minutes <= 59):
+        raise ValueError(f"Time point out of range: {value}")
+    return hours * 60 + minutes
+
+def transition_timestamp(moment, after):
+    """Get the POSIX timestamp at which local time reaches a naive datetime, or None if not after `after`.
+
+    A time repeated when DST ends resolves to the first occurrence still
+    ahead; a time skipped when DST starts resolves to the instant the clock
+    jumps over it.
+    """
+    first = moment.replace(fold=0).timestamp()
+    second = moment.replace(fold=1).timestamp()
+    if first <= second:
+        for timestamp in (first, second):
+            if timestamp > after:
+                return timestamp
+        return None
+
+    # Skipped time: find the first second whose local time is at or past moment
+    low, high = second, first
+    while high - low > 1:
+        middle = (low + high) / 2
+        if datetime.datetime.fromtimestamp(middle) >= moment:
+            high = middle
+        else:
+            low = middle
+    return high if high > after else None
+
+def uses_solar_time_points(time_ranges):
+    """Check whether any time range starts or ends at a solar event, making the schedule date dependent"""
+    return any(
+        parse_solar_time_point(time_point) is not None
+        for start_end in schedule_geometry(time_ranges) for time_point in start_end
+    )
+
+def schedule_geometry(time_ranges):
+    """Get the start and end times of a list of time ranges, ignoring their images"""
+    return [
+        (time_range.get("start"), time_range.get("end")) if isinstance(time_range, dict) else time_range
+        for time_range in time_ranges
+    ]
+
+def compile_dated_index(date, time_ranges, calendar=None, solar_times_for=None):
+    """Compile the time ranges active on a date into an index.
+
+    calendar is the CalendarRules layered over time_ranges, if any.
+    solar_times_for(date) gets the solar event times of a date and is only
+    needed when the ranges use solar time points.
+    """
+    if calendar is not None:
+        time_ranges = calendar.time_ranges_for(date)
+    return ScheduleIndex(time_ranges, solar_times_for(date) if solar_times_for else None)
+
+class ScheduleIndex:
+    """Immutable minute-of-day lookup table compiled from a list of time ranges.
+
+    Every range covers the half-open interval [start, end). A range whose end is
+    earlier than its start wraps past midnight, and one whose end equals its
+    start covers the whole day. Where ranges overlap, the entry
+    that comes first in the list wins, which matches the order the old linear
+    scan returned. Lookups are two tuple indexes and never allocate.
+
+    Solar time points are resolved once, at compile time, from solar_times,
+    so an index with them is only valid for the day those times belong to.
+    """
+    __slots__ = ('_slots', '_ranges', '_boundaries', 'range_count')
+
+    def __init__(self, time_ranges, solar_times=None):
+        # Each slot holds a position in time_ranges; -1 selects the trailing None
+        slots = [-1] * MINUTES_PER_DAY
+        compiled = 0
+
+        # Fill in reverse order so earlier ranges overwrite later ones
+        for position in range(len(time_ranges) - 1, -1, -1):
+            time_range = time_ranges[position]
+            try:
+                start = parse_time_point(time_range["start"], solar_times)
+                end = parse_time_point(time_range["end"], solar_times)
+            except (KeyError, TypeError, AttributeError, ValueError) as e:
+                logging.warning(f"Skipping invalid time range {time_range!r}: {e}")
+                continue
+
+            if start < end:  # Normal case: start < end
+                slots[start:end] = [position] * (end - start)
+            elif start > end:  # Overnight case: start > end (e.g., 23:00-8:30)
+                slots[start:] = [position] * (MINUTES_PER_DAY - start)
+                slots[:end] = [position] * end
+            else:  # Whole day: start == end (e.g., 00:00-00:00)
+                slots[:] = [position] * MINUTES_PER_DAY
+            compiled += 1
+
+        self._slots = tuple(slots)
+        self._ranges = tuple(time_ranges) + (None,)
+        # Minutes at which the active range differs from the previous minute
+        self._boundaries = tuple(
+            minute for minute in range(MINUTES_PER_DAY)
+            if slots[minute] != slots[minute - 1]
+        )
+        self.range_count = compiled
+
+    def rebind(self, time_ranges):
+        """Get an index for ranges with the same start and end times as this one's, without recompiling.
+
+        Only use this when schedule_geometry() of the new ranges matches the
+        ranges this index was compiled from, e.g. when only images changed.
+        """
+        index = ScheduleIndex.__new__(ScheduleIndex)
+        index._slots = self._slots
+        index._ranges = tuple(time_ranges) + (None,)
+        index._boundaries = self._boundaries
+        index.range_count = self.range_count
+        return index
+
+    def lookup(self, minute_of_day):
+        """Return the time range active at the given minute of the day"""
+        return self._ranges[self._slots[minute_of_day]]
+
+    def range_at(self, moment):
+        """Return the time range active at a datetime or time object"""
+        return self._ranges[self._slots[moment.hour * 60 + moment.minute]]
+
+    @property
+    def boundaries(self):
+        """Sorted minutes of the day at which the active range changes"""
+        return self._boundaries
+
+    def span_at(self, minute_of_day):
+        """Return the start minute and length of the uninterrupted stretch of the range active at a minute"""
+        if not self._boundaries:
+            return 0, MINUTES_PER_DAY
+        index = bisect.bisect_right(self._boundaries, minute_of_day)
+        # Index -1 wraps to the last boundary, for stretches that run past midnight
+        start = self._boundaries[index - 1]
+        end = self._boundaries[index % len(self._boundaries)]
+        return start, (end - start) % MINUTES_PER_DAY or MINUTES_PER_DAY
+
+    def next_boundary(self, minute_of_day):
+        """Return the first boundary after the given minute, or None if the range never changes.
+
+        Minutes are counted from the start of the current day, so both the
+        argument and the result may exceed MINUTES_PER_DAY for later days.
+        """
+        if not self._boundaries:
+            return None
+        day, minute = divmod(minute_of_day, MINUTES_PER_DAY)
+        index = bisect.bisect_right(self._boundaries, minute)
+        if index < len(self._boundaries):
+            return self._boundaries[index] + day * MINUTES_PER_DAY
+        return self._boundaries[0] + (day + 1) * MINUTES_PER_DAY
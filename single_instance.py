@@ -0,0 +1,91 @@
+import os
+import sys
+import time
+import logging
+from control_channel import get_control_dir, send_command, ControlError, CHANNEL_NAME
+
+# Constants
+LOCK_FILE = "instance.lock"
+ERROR_ALREADY_EXISTS = 183
+FORWARD_ATTEMPTS = 10
+FORWARD_RETRY_DELAY = 0.2  # seconds; the running instance may still be starting its control channel
+
+class InstanceLock:
+    """Per-user lock held by the one running instance of the application.
+
+    Windows uses a named mutex and other platforms an flock()ed file. Either
+    way the operating system releases the lock when the process exits, so a
+    crashed instance never leaves a stale lock behind.
+    """
+    def __init__(self):
+        self.handle = None
+        self.kernel32 = None
+
+    def acquire(self):
+        """Try to take the lock without waiting; returns True if this is the primary instance.
+
+        Raises ControlError if the per-user directory holding the lock is not private.
+        """
+        if self.handle is not None:
+            return True
+        if sys.platform == 'win32':
+            return self._acquire_mutex()
+        return self._acquire_flock()
+
+    def _acquire_mutex(self):
+        import ctypes
+        from ctypes import wintypes
+
+        kernel32 = ctypes.WinDLL('kernel32', use_last_error=True)
+        kernel32.CreateMutexW.restype = wintypes.HANDLE
+        kernel32.CreateMutexW.argtypes = [wintypes.LPVOID, wintypes.BOOL, wintypes.LPCWSTR]
+        kernel32.CloseHandle.argtypes = [wintypes.HANDLE]
+
+        user = os.environ.get('USERNAME', 'user')
+        handle = kernel32.CreateMutexW(None, False, f"Local\\{CHANNEL_NAME}-{user}")
+        if not handle:
+            raise ctypes.WinError(ctypes.get_last_error())
+        if ctypes.get_last_error() == ERROR_ALREADY_EXISTS:
+            kernel32.CloseHandle(handle)
+            return False
+        self.handle = handle
+        self.kernel32 = kernel32
+        return True
+
+    def _acquire_flock(self):
+        import fcntl
+
+        # get_control_dir() refuses a directory another user could have planted a lock in
+        fd = os.open(os.path.join(get_control_dir(), LOCK_FILE), os.O_RDWR | os.O_CREAT | os.O_NOFOLLOW, 0o600)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            os.close(fd)
+            return False
+        os.ftruncate(fd, 0)
+        os.write(fd, str(os.getpid()).encode())
+        self.handle = fd
+        return True
+
+    def release(self):
+        """Give up the lock, e.g. before handing off to another process"""
+        if self.handle is None:
+            return
+        if self.kernel32 is not None:
+            self.kernel32.CloseHandle(self.handle)
+        else:
+            os.close(self.handle)
+        self.handle = None
+
+def forward_to_running_instance(command):
+    """Send a launch intent to the primary instance; returns True if it was delivered"""
+    for attempt in range(FORWARD_ATTEMPTS):
+        try:
+            send_command(command)
+            logging.info(f"Forwarded '{command}' to the running instance")
+            return True
+        except ControlError as e:
+            if attempt == FORWARD_ATTEMPTS - 1:
+                logging.error(f"Could not reach the running instance: {e}")
+                return False
+            time.sleep(FORWARD_RETRY_DELAY)
@@ -0,0 +1,134 @@
+import re
+import math
+import array
+import datetime
+import functools
+
+# Constants
+SOLAR_EVENTS = ("civil_dawn", "sunrise", "solar_noon", "sunset", "civil_dusk")
+SUNRISE_ZENITH = 90.833  # Degrees; accounts for refraction and the size of the sun's disc
+CIVIL_ZENITH = 96.0
+NO_EVENT = -32768  # Table value for an event that does not happen that day (polar day or night)
+SOLAR_TIME_POINT = re.compile(r"^\s*(" + "|".join(SOLAR_EVENTS) + r")\s*(?:([+-])\s*(\d+))?\s*$")
+
+def parse_solar_time_point(value):
+    """Split a solar time point like "sunset-30" into its event and offset in minutes, or None"""
+    match = SOLAR_TIME_POINT.match(value) if isinstance(value, str) else None
+    if not match:
+        return None
+    event, sign, offset = match.groups()
+    offset = int(offset) if offset else 0
+    return event, -offset if sign == "-" else offset
+
+def is_solar_time_point(value):
+    """Check whether a time point is relative to a solar event"""
+    return parse_solar_time_point(value) is not None
+
+def solar_events_utc(latitude, longitude, date):
+    """Compute the solar events of a date as minutes after 00:00 UTC, using the NOAA solar equations.
+
+    Accurate to about a minute between the polar circles. Events that do
+    not happen that day are None.
+    """
+    # Julian century at the approximate local solar noon
+    julian_day = date.toordinal() + 1721424.5 + 0.5 - longitude / 360
+    t = (julian_day - 2451545) / 36525
+
+    mean_longitude = (280.46646 + t * (36000.76983 + t * 0.0003032)) % 360
+    mean_anomaly = math.radians(357.52911 + t * (35999.05029 - 0.0001537 * t))
+    eccentricity = 0.016708634 - t * (0.000042037 + 0.0000001267 * t)
+    center = (
+        math.sin(mean_anomaly) * (1.914602 - t * (0.004817 + 0.000014 * t))
+        + math.sin(2 * mean_anomaly) * (0.019993 - 0.000101 * t)
+        + math.sin(3 * mean_anomaly) * 0.000289
+    )
+    omega = math.radians(125.04 - 1934.136 * t)
+    apparent_longitude = math.radians(mean_longitude + center - 0.00569 - 0.00478 * math.sin(omega))
+    mean_obliquity = 23 + (26 + (21.448 - t * (46.815 + t * (0.00059 - t * 0.001813))) / 60) / 60
+    obliquity = math.radians(mean_obliquity + 0.00256 * math.cos(omega))
+    declination = math.asin(math.sin(obliquity) * math.sin(apparent_longitude))
+
+    y = math.tan(obliquity / 2) ** 2
+    l0 = math.radians(mean_longitude)
+    equation_of_time = 4 * math.degrees(
+        y * math.sin(2 * l0)
+        - 2 * eccentricity * math.sin(mean_anomaly)
+        + 4 * eccentricity * y * math.sin(mean_anomaly) * math.cos(2 * l0)
+        - 0.5 * y * y * math.sin(4 * l0)
+        - 1.25 * eccentricity * eccentricity * math.sin(2 * mean_anomaly)
+    )
+    solar_noon = 720 - 4 * longitude - equation_of_time
+
+    def hour_angle(zenith):
+        phi = math.radians(latitude)
+        cos_angle = (
+            (math.cos(math.radians(zenith)) - math.sin(phi) * math.sin(declination))
+            / (math.cos(phi) * math.cos(declination))
+        )
+        if not -1 <= cos_angle <= 1:
+            return None
+        return 4 * math.degrees(math.acos(cos_angle))
+
+    sunrise = hour_angle(SUNRISE_ZENITH)
+    civil = hour_angle(CIVIL_ZENITH)
+    return {
+        "civil_dawn": solar_noon - civil if civil is not None else None,
+        "sunrise": solar_noon - sunrise if sunrise is not None else None,
+        "solar_noon": solar_noon,
+        "sunset": solar_noon + sunrise if sunrise is not None else None,
+        "civil_dusk": solar_noon + civil if civil is not None else None,
+    }
+
+class SolarTable:
+    """Solar event times for every day of one year at one location.
+
+    Times are stored as whole minutes after 00:00 UTC in a flat array of
+    16-bit integers, one row of SOLAR_EVENTS per day, about 3.7 kB per year.
+    """
+    __slots__ = ('year', '_first_ordinal', '_minutes')
+
+    def __init__(self, latitude, longitude, year):
+        self.year = year
+        self._first_ordinal = datetime.date(year, 1, 1).toordinal()
+        days = datetime.date(year + 1, 1, 1).toordinal() - self._first_ordinal
+        minutes = array.array('h')
+        for day in range(days):
+            events = solar_events_utc(latitude, longitude, datetime.date.fromordinal(self._first_ordinal + day))
+            minutes.extend(
+                NO_EVENT if events[event] is None else round(events[event])
+                for event in SOLAR_EVENTS
+            )
+        self._minutes = minutes
+
+    def events_utc(self, date):
+        """Get the solar events of a date in this table's year as minutes after 00:00 UTC"""
+        row = (date.toordinal() - self._first_ordinal) * len(SOLAR_EVENTS)
+        return {
+            event: None if self._minutes[row + i] == NO_EVENT else self._minutes[row + i]
+            for i, event in enumerate(SOLAR_EVENTS)
+        }
+
+@functools.lru_cache(maxsize=4)
+def solar_table(latitude, longitude, year):
+    """Get the memoized solar table of a location and year"""
+    return SolarTable(latitude, longitude, year)
+
+def configured_location(settings):
+    """Get the (latitude, longitude) set in the settings, or None if either is missing"""
+    latitude, longitude = settings.get("latitude"), settings.get("longitude")
+    if latitude is None or longitude is None:
+        return None
+    return float(latitude), float(longitude)
+
+def solar_times(latitude, longitude, date):
+    """Get the local minute of the day of each solar event on a date, or None for events that do not happen"""
+    midnight_utc = datetime.datetime(date.year, date.month, date.day, tzinfo=datetime.timezone.utc).timestamp()
+    times = {}
+    for event, minutes in solar_table(latitude, longitude, date.year).events_utc(date).items():
+        if minutes is None:
+            times[event] = None
+            continue
+        # Converting through a timestamp applies the UTC offset in effect at that moment, DST included
+        local = datetime.datetime.fromtimestamp(midnight_utc + minutes * 60)
+        times[event] = local.hour * 60 + local.minute
+    return times
@@ -0,0 +1,173 @@
+import os
+import queue
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from PIL import Image, ImageOps, ImageTk
+
+# Constants
+THUMBNAIL_CACHE_DIR = "thumbnail_cache"
+THUMBNAIL_SIZE = (64, 36)
+THUMBNAIL_EXTENSION = ".png"
+THUMBNAIL_WORKERS = 2
+POLL_INTERVAL = 50  # ms between checks for finished thumbnails
+PLACEHOLDER_COLOR = (200, 200, 200)
+DEFAULT_BUDGET_MB = 16  # Disk space for cached thumbnails, a few thousand at the default size
+EVICT_TO = 0.9  # Fraction of the budget eviction frees down to, so it does not run on every new thumbnail
+MAX_PHOTOS = 512  # Tk images kept in memory; far more than the rows an editor shows at once
+
+class ThumbnailCache:
+    """Thumbnails stored on disk, keyed by image path, thumbnail size and modification time.
+
+    Least recently used thumbnails are evicted once the cache grows past its
+    byte budget, as in RenderCache. The size on disk is measured once and then
+    tracked as thumbnails are added, so only an eviction scans the folder.
+    """
+    def __init__(self, cache_dir, size=THUMBNAIL_SIZE, budget_bytes=DEFAULT_BUDGET_MB * 1024 * 1024):
+        self.cache_dir = cache_dir
+        self.size = size
+        self.budget_bytes = budget_bytes
+        self._total_bytes = None  # Bytes on disk; None until first measured
+        self._lock = threading.Lock()
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+    def cache_path(self, image_path):
+        """Get the cache file path for the current version of an image"""
+        stat = os.stat(image_path)
+        width, height = self.size
+        key = f"{os.path.abspath(image_path)}|{width}x{height}|{stat.st_size}|{stat.st_mtime_ns}"
+        name = hashlib.blake2b(key.encode('utf-8'), digest_size=16).hexdigest()
+        return os.path.join(self.cache_dir, name + THUMBNAIL_EXTENSION)
+
+    def get(self, image_path):
+        """Get the thumbnail of an image, decoding and caching it on a miss"""
+        path = self.cache_path(image_path)
+        if os.path.exists(path):
+            # Touch the entry so eviction treats it as recently used
+            os.utime(path, None)
+            thumbnail = Image.open(path)
+            thumbnail.load()
+            return thumbnail
+
+        with Image.open(image_path) as image:
+            # Let JPEG decoding skip detail that the thumbnail would throw away
+            image.draft('RGB', self.size)
+            thumbnail = ImageOps.exif_transpose(image).convert('RGB')
+        thumbnail.thumbnail(self.size)
+
+        temp_path = f"{path}.{os.getpid()}.tmp"
+        thumbnail.save(temp_path, "PNG")
+        os.replace(temp_path, path)
+        self._added(path)
+        return thumbnail
+
+    def _added(self, path):
+        """Account for a new thumbnail and evict old ones once over the budget"""
+        with self._lock:
+            if self._total_bytes is None:
+                self._total_bytes = self.evict(self.budget_bytes, keep=path)
+            else:
+                self._total_bytes += os.path.getsize(path)
+                if self._total_bytes > self.budget_bytes:
+                    self._total_bytes = self.evict(int(self.budget_bytes * EVICT_TO), keep=path)
+
+    def evict(self, target_bytes, keep=None):
+        """Remove least recently used thumbnails until at most target_bytes remain, and return the bytes left"""
+        entries = []
+        total = 0
+        for entry in os.scandir(self.cache_dir):
+            if not entry.name.endswith(THUMBNAIL_EXTENSION):
+                continue
+            try:
+                stat = entry.stat()
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, entry.path))
+            total += stat.st_size
+
+        entries.sort()
+        for _, entry_size, entry_path in entries:
+            if total <= target_bytes:
+                break
+            if entry_path == keep:
+                continue
+            try:
+                os.remove(entry_path)
+                total -= entry_size
+            except OSError as e:
+                logging.warning(f"Could not evict thumbnail {entry_path}: {e}")
+        return total
+
+class ThumbnailLoader:
+    """Loads thumbnails on a small worker pool and hands them to Tk on its own thread.
+
+    get() returns a placeholder right away and queues the image. The Tk
+    thread polls for finished thumbnails with after() and calls
+    on_ready(path) for each one, so the window stays responsive while
+    thumbnails fill in.
+    """
+    def __init__(self, root, cache_dir, on_ready, size=THUMBNAIL_SIZE, workers=THUMBNAIL_WORKERS):
+        self.root = root
+        self.cache = ThumbnailCache(cache_dir, size)
+        self.on_ready = on_ready
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="thumbnail")
+        self.results = queue.Queue()
+        self.photos = OrderedDict()  # Image path -> PhotoImage, or None if it could not be loaded; oldest first
+        self.pending = set()
+        self.closed = False
+        self.placeholder = ImageTk.PhotoImage(Image.new('RGB', size, PLACEHOLDER_COLOR), master=root)
+
+        root.bind("<Destroy>", self._on_destroy, add="+")
+        root.after(POLL_INTERVAL, self.poll)
+
+    def get(self, image_path):
+        """Get the thumbnail of an image, or the placeholder until it has been loaded"""
+        if not image_path:
+            return self.placeholder
+        if image_path in self.photos:
+            self.photos.move_to_end(image_path)
+            return self.photos[image_path] or self.placeholder
+
+        if image_path not in self.pending:
+            self.pending.add(image_path)
+            self.executor.submit(self._load, image_path)
+        return self.placeholder
+
+    def _load(self, image_path):
+        if self.closed:
+            return
+        try:
+            thumbnail = self.cache.get(image_path)
+        except Exception as e:
+            logging.warning(f"Could not create thumbnail for {image_path}: {e}")
+            thumbnail = None
+        self.results.put((image_path, thumbnail))
+
+    def poll(self):
+        """Turn finished thumbnails into Tk images; runs on the Tk thread"""
+        if self.closed:
+            return
+        try:
+            while True:
+                image_path, thumbnail = self.results.get_nowait()
+                self.pending.discard(image_path)
+                self.photos[image_path] = ImageTk.PhotoImage(thumbnail, master=self.root) if thumbnail else None
+                if len(self.photos) > MAX_PHOTOS:
+                    # Rows scrolled away long ago; their images are read back from disk if needed again
+                    self.photos.popitem(last=False)
+                self.on_ready(image_path)
+        except queue.Empty:
+            pass
+        self.root.after(POLL_INTERVAL, self.poll)
+
+    def close(self):
+        """Stop loading; queued thumbnails that have not started are skipped"""
+        self.closed = True
+        self.executor.shutdown(wait=False)
+
+    def _on_destroy(self, event):
+        # <Destroy> is also delivered for every child of the root window
+        if event.widget is self.root:
+            self.close()
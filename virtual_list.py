@@ -0,0 +1,140 @@
+import tkinter as tk
+
+# Constants
+ROW_PADDING = 2  # pixels above and below each row
+WHEEL_DELTA = 120  # MouseWheel delta of one notch on Windows
+
+class VirtualRowList:
+    """Scrollable list that only has widgets for the rows on screen.
+
+    A pool of row widgets just large enough to fill the visible area is
+    created once. Scrolling and edits rebind pooled rows to other items
+    instead of creating or destroying widgets, so opening the list and
+    changing it take the same time for ten items or ten thousand.
+
+    create_row(parent) builds one pooled row and returns a dict holding its
+    top-level widget under "frame" plus whatever else bind_row needs.
+    bind_row(row, index) fills a row with the item at index. The list keeps
+    the item a row currently shows in row["index"] (None while hidden).
+    """
+    def __init__(self, parent, create_row, bind_row, row_count=0, bg="#f0f0f0"):
+        self.create_row = create_row
+        self.bind_row = bind_row
+        self.row_count = row_count
+        self.first = 0  # Index of the item shown in the top row
+        self.rows = []
+        self.row_height = None
+
+        self.frame = tk.Frame(parent, bg=bg)
+        self.scrollbar = tk.Scrollbar(self.frame, orient="vertical", command=self.yview)
+        self.scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+
+        # The body keeps its size from the layout, not from the rows inside it
+        self.body = tk.Frame(self.frame, bg=bg)
+        self.body.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        self.body.pack_propagate(False)
+        self.body.bind("<Configure>", lambda event: self.layout())
+        self.bind_wheel(self.body)
+
+    def bind_wheel(self, widget):
+        """Scroll the list with the mouse wheel while the pointer is over a widget"""
+        widget.bind("<MouseWheel>", self.on_mousewheel)
+        widget.bind("<Button-4>", lambda event: self.scroll(-1))
+        widget.bind("<Button-5>", lambda event: self.scroll(1))
+
+    def on_mousewheel(self, event):
+        # Smooth-scrolling devices report fractions of a notch; those still move one row
+        steps = round(event.delta / WHEEL_DELTA) or (1 if event.delta > 0 else -1)
+        self.scroll(-steps)
+
+    def add_row(self):
+        """Create another pooled row"""
+        row = self.create_row(self.body)
+        row["index"] = None
+        row["shown"] = False
+        self.bind_wheel(row["frame"])
+        for child in row["frame"].winfo_children():
+            self.bind_wheel(child)
+        self.rows.append(row)
+        return row
+
+    def layout(self):
+        """Grow the row pool to cover the visible area and rebind the rows"""
+        if self.row_height is None:
+            row = self.add_row()
+            row["frame"].update_idletasks()
+            self.row_height = max(row["frame"].winfo_reqheight() + 2 * ROW_PADDING, 1)
+
+        needed = self.body.winfo_height() // self.row_height + 1
+        while len(self.rows) < needed:
+            self.add_row()
+        self.refresh()
+
+    def page_size(self):
+        """Get the number of rows that fit in the visible area"""
+        if not self.row_height:
+            return 1
+        return max(self.body.winfo_height() // self.row_height, 1)
+
+    def refresh(self, index=None):
+        """Rebind every visible row, or only the row showing the item at index"""
+        self.first = max(0, min(self.first, self.row_count - self.page_size()))
+
+        for offset, row in enumerate(self.rows):
+            item = self.first + offset
+            if index is not None and item != index:
+                continue
+
+            if item < self.row_count:
+                # Hidden rows are always at the end, so re-packing keeps the order
+                if not row["shown"]:
+                    row["frame"].pack(fill=tk.X, pady=ROW_PADDING)
+                    row["shown"] = True
+                row["index"] = item
+                self.bind_row(row, item)
+            elif row["shown"]:
+                row["frame"].pack_forget()
+                row["shown"] = False
+                row["index"] = None
+
+        if self.row_count:
+            last = min(self.first + self.page_size(), self.row_count)
+            self.scrollbar.set(self.first / self.row_count, last / self.row_count)
+        else:
+            self.scrollbar.set(0, 1)
+
+    def set_count(self, row_count):
+        """Change the number of items and rebind the visible rows"""
+        self.row_count = row_count
+        self.refresh()
+
+    def scroll(self, rows):
+        """Scroll by a number of rows; negative values scroll up"""
+        self.first += rows
+        self.refresh()
+
+    def yview(self, *args):
+        """Handle scrollbar commands"""
+        if args[0] == "moveto":
+            self.first = int(float(args[1]) * self.row_count)
+        elif args[0] == "scroll":
+            amount = int(args[1])
+            if args[2] == "pages":
+                amount *= self.page_size()
+            self.first += amount
+        self.refresh()
+
+    def scroll_to(self, index):
+        """Scroll just enough to make the item at index visible"""
+        if index < self.first:
+            self.first = index
+        elif index >= self.first + self.page_size():
+            self.first = index - self.page_size() + 1
+        self.refresh()
+
+    def row_for(self, index):
+        """Get the pooled row currently showing the item at index, if it is on screen"""
+        for row in self.rows:
+            if row["index"] == index:
+                return row
+        return None
@@ -0,0 +1,282 @@
+import os
+import abc
+import sys
+import time
+import ctypes
+import logging
+import threading
+
+# Constants
+BACKEND_ENV_VAR = "TIMEBG_BACKEND"
+DEFAULT_RECORDING_SIZE = (1920, 1080)
+XRANDR_CACHE_SECONDS = 60  # How long a display layout read from xrandr is reused
+
+class WallpaperBackend(abc.ABC):
+    """Base class for the platform specific code that applies a wallpaper"""
+    name = "base"
+    supported_formats = None  # Pillow format names the backend can apply directly; None means any
+
+    @abc.abstractmethod
+    def apply(self, image_path, span=False, persist=True):
+        """Set the desktop wallpaper to the image at image_path; span stretches one image across all monitors.
+
+        With persist=False the wallpaper is only shown, not saved as the user's
+        setting, which suits short-lived crossfade frames. Backends that cannot
+        tell the two apart always persist.
+        """
+
+    def get_display_size(self):
+        """Get the display resolution in pixels, or None if it is unknown"""
+        return None
+
+    def get_monitors(self):
+        """Get the monitors as (x, y, width, height) rectangles in desktop coordinates"""
+        display_size = self.get_display_size()
+        return [(0, 0) + tuple(display_size)] if display_size else []
+
+class WindowsBackend(WallpaperBackend):
+    """Applies wallpapers through SystemParametersInfoW"""
+    name = "windows"
+    supported_formats = frozenset({"BMP", "JPEG", "PNG", "GIF", "TIFF"})
+
+    SPI_SETDESKWALLPAPER = 20
+    SPIF_UPDATEINIFILE_SENDCHANGE = 3
+    SPIF_NONE = 0  # Show only: no registry write and no WM_SETTINGCHANGE broadcast
+    SM_CXSCREEN = 0
+    SM_CYSCREEN = 1
+    DESKTOP_KEY = r"Control Panel\Desktop"
+    STYLE_SPAN = "22"
+    STYLE_FILL = "10"
+
+    def __init__(self):
+        self.user32 = ctypes.windll.user32
+        # Without DPI awareness Windows reports scaled sizes
+        self.user32.SetProcessDPIAware()
+        self.spanning = None  # Whether the wallpaper style is span; None until first checked
+
+    def set_span(self, span):
+        """Switch the wallpaper style to span for composites, and back to fill afterwards"""
+        if span == self.spanning:
+            return
+        import winreg
+
+        with winreg.OpenKey(winreg.HKEY_CURRENT_USER, self.DESKTOP_KEY, 0,
+                            winreg.KEY_QUERY_VALUE | winreg.KEY_SET_VALUE) as key:
+            try:
+                style = winreg.QueryValueEx(key, "WallpaperStyle")[0]
+            except FileNotFoundError:
+                style = None
+            if span:
+                winreg.SetValueEx(key, "WallpaperStyle", 0, winreg.REG_SZ, self.STYLE_SPAN)
+                winreg.SetValueEx(key, "TileWallpaper", 0, winreg.REG_SZ, "0")
+            elif style == self.STYLE_SPAN:
+                # Rendered wallpapers match the display size, so fill shows them unchanged
+                winreg.SetValueEx(key, "WallpaperStyle", 0, winreg.REG_SZ, self.STYLE_FILL)
+        self.spanning = span
+
+    def apply(self, image_path, span=False, persist=True):
+        self.set_span(span)
+        flags = self.SPIF_UPDATEINIFILE_SENDCHANGE if persist else self.SPIF_NONE
+        if not self.user32.SystemParametersInfoW(self.SPI_SETDESKWALLPAPER, 0, image_path, flags):
+            raise ctypes.WinError()
+
+    def get_display_size(self):
+        return (
+            self.user32.GetSystemMetrics(self.SM_CXSCREEN),
+            self.user32.GetSystemMetrics(self.SM_CYSCREEN)
+        )
+
+    def get_monitors(self):
+        from ctypes import wintypes
+
+        monitors = []
+        callback_type = ctypes.WINFUNCTYPE(
+            ctypes.c_int, wintypes.HMONITOR, wintypes.HDC, ctypes.POINTER(wintypes.RECT), wintypes.LPARAM
+        )
+
+        def collect(monitor, dc, rect, data):
+            r = rect.contents
+            monitors.append((r.left, r.top, r.right - r.left, r.bottom - r.top))
+            return 1  # Continue enumerating
+
+        if not self.user32.EnumDisplayMonitors(None, None, callback_type(collect), 0):
+            raise ctypes.WinError()
+        return monitors
+
+class LinuxBackend(WallpaperBackend):
+    """Applies wallpapers through gsettings on GNOME-based desktops, or feh elsewhere"""
+    name = "linux"
+
+    def __init__(self):
+        import shutil
+
+        self.gsettings = shutil.which("gsettings")
+        self.feh = shutil.which("feh")
+        if not self.gsettings and not self.feh:
+            raise RuntimeError("Neither gsettings nor feh is available")
+        self.spanning = None  # Whether picture-options is spanned; None until first checked
+        self._xrandr_output = None  # Last xrandr output, shared by the display size and monitor queries
+        self._xrandr_time = 0.0
+        self._lock = threading.Lock()
+
+    def set_span(self, span):
+        """Switch GNOME's picture options to spanned for composites, and back to zoom afterwards"""
+        import subprocess
+
+        if span == self.spanning:
+            return
+        schema = "org.gnome.desktop.background"
+        if span:
+            subprocess.run([self.gsettings, "set", schema, "picture-options", "spanned"], check=True, capture_output=True)
+        else:
+            current = subprocess.run(
+                [self.gsettings, "get", schema, "picture-options"], check=True, capture_output=True, text=True
+            ).stdout.strip()
+            if current == "'spanned'":
+                subprocess.run([self.gsettings, "set", schema, "picture-options", "zoom"], check=True, capture_output=True)
+        self.spanning = span
+
+    def apply(self, image_path, span=False, persist=True):
+        try:
+            self._apply(image_path, span)
+        except Exception:
+            # The display layout may have changed under us, so ask xrandr again next time
+            self.invalidate_layout()
+            raise
+
+    def _apply(self, image_path, span):
+        import subprocess
+        from pathlib import Path
+
+        if self.gsettings:
+            self.set_span(span)
+            uri = Path(image_path).as_uri()
+            for key in ("picture-uri", "picture-uri-dark"):
+                # picture-uri-dark only exists on newer GNOME versions
+                subprocess.run(
+                    [self.gsettings, "set", "org.gnome.desktop.background", key, uri],
+                    check=(key == "picture-uri"), capture_output=True
+                )
+        else:
+            # Without Xinerama, feh treats all monitors as one screen
+            options = ["--no-xinerama"] if span else []
+            subprocess.run([self.feh, "--no-fehbg", *options, "--bg-fill", image_path], check=True, capture_output=True)
+
+    def invalidate_layout(self):
+        """Forget the cached xrandr output"""
+        with self._lock:
+            self._xrandr_output = None
+
+    def query_xrandr(self):
+        """Get the output of xrandr, reusing it for XRANDR_CACHE_SECONDS, or None if xrandr failed"""
+        import subprocess
+
+        with self._lock:
+            now = time.monotonic()
+            if self._xrandr_output is None or now - self._xrandr_time >= XRANDR_CACHE_SECONDS:
+                try:
+                    self._xrandr_output = subprocess.run(
+                        ["xrandr", "--current"], check=True, capture_output=True, text=True
+                    ).stdout
+                except (OSError, subprocess.CalledProcessError):
+                    # Remember the failure too, so a missing xrandr is not started on every call
+                    self._xrandr_output = ""
+                self._xrandr_time = now
+            return self._xrandr_output or None
+
+    def get_display_size(self):
+        import re
+
+        output = self.query_xrandr()
+        match = re.search(r"current (\d+) x (\d+)", output) if output else None
+        return (int(match.group(1)), int(match.group(2))) if match else None
+
+    def get_monitors(self):
+        import re
+
+        output = self.query_xrandr()
+        if not output:
+            return []
+        return [
+            (int(x), int(y), int(width), int(height))
+            for width, height, x, y in re.findall(r" connected (?:primary )?(\d+)x(\d+)\+(\d+)\+(\d+)", output)
+        ]
+
+class RecordingBackend(WallpaperBackend):
+    """Records applies in memory instead of changing the desktop, for headless runs"""
+    name = "recording"
+
+    def __init__(self, display_size=DEFAULT_RECORDING_SIZE, time_source=time.time, monitors=None):
+        self.display_size = display_size
+        self.time_source = time_source
+        self.monitors = monitors  # (x, y, width, height) rectangles; None means one display_size monitor
+        self.applied = []  # (timestamp, image_path) tuples
+        self._lock = threading.Lock()
+
+    def apply(self, image_path, span=False, persist=True):
+        timestamp = self.time_source()
+        with self._lock:
+            self.applied.append((timestamp, image_path))
+        mode = (" (spanning)" if span else "") + ("" if persist else " (not persisted)")
+        logging.info(f"Recorded wallpaper apply at {timestamp:.3f}{mode}: {image_path}")
+
+    def get_display_size(self):
+        return self.display_size
+
+    def get_monitors(self):
+        if self.monitors is not None:
+            return list(self.monitors)
+        return super().get_monitors()
+
+class TimedBackend(WallpaperBackend):
+    """Wraps another backend and measures the latency of every call"""
+    def __init__(self, backend, metrics=None):
+        self.backend = backend
+        self.metrics = metrics  # Optional MetricsRegistry that also receives every latency
+        self.name = backend.name
+        self.supported_formats = backend.supported_formats
+        self.call_counts = {}
+        self.total_seconds = {}
+        self.last_seconds = {}
+        self._lock = threading.Lock()
+
+    def _timed(self, method_name, *args):
+        start = time.perf_counter()
+        try:
+            return getattr(self.backend, method_name)(*args)
+        finally:
+            elapsed = time.perf_counter() - start
+            with self._lock:
+                self.call_counts[method_name] = self.call_counts.get(method_name, 0) + 1
+                self.total_seconds[method_name] = self.total_seconds.get(method_name, 0.0) + elapsed
+                self.last_seconds[method_name] = elapsed
+            if self.metrics is not None:
+                self.metrics.observe("backend_call_seconds", elapsed, backend=self.name, method=method_name)
+            logging.debug(f"{self.name} backend {method_name} took {elapsed * 1000:.1f} ms")
+
+    def apply(self, image_path, span=False, persist=True):
+        return self._timed("apply", image_path, span, persist)
+
+    def get_display_size(self):
+        return self._timed("get_display_size")
+
+    def get_monitors(self):
+        return self._timed("get_monitors")
+
+BACKENDS = {
+    "windows": WindowsBackend,
+    "linux": LinuxBackend,
+    "recording": RecordingBackend,
+}
+
+def get_backend(name=None, metrics=None):
+    """Create a timed wallpaper backend from the environment, a name, or the current platform"""
+    name = os.environ.get(BACKEND_ENV_VAR) or name
+    if not name:
+        name = "windows" if sys.platform == "win32" else "linux"
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown wallpaper backend: {name}")
+
+    backend = TimedBackend(BACKENDS[name](), metrics)
+    logging.info(f"Using {name} wallpaper backend")
+    return backend